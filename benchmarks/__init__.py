@@ -0,0 +1,3 @@
+"""
+Benchmarks of ch0p1n. See `benchmarks.run`.
+"""
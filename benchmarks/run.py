@@ -0,0 +1,389 @@
+"""
+Time the public operations of ch0p1n over increasing sizes.
+
+Run from the repository root:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline results.json
+
+Each case is timed at each of its sizes, and its peak memory traced.
+Results are written to JSON, together with the scaling exponent
+of each case, and compared with a baseline if given,
+exiting with 1 if any case is slower than the threshold allows.
+"""
+
+import io
+import sys
+import json
+import math
+import random
+import timeit
+import argparse
+import platform
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple, Optional, Any
+from ch0p1n import motif, utils, musicxml
+from benchmarks import workload
+
+Thunk = Callable[[], Any]
+Case = Tuple[Callable[[random.Random, int], Thunk], List[int]]
+# how to set up a call of a given size, and the default sizes
+
+
+
+# cases --------------------------------------------------------
+
+def _transpose(rng: random.Random, n: int) -> Thunk:
+    pitch_motif = workload.make_pitch_motif(rng, n)
+    scale = workload.make_scale(rng)
+    return lambda: motif.transpose(pitch_motif, scale, 2)
+
+
+def _rescale(rng: random.Random, n: int) -> Thunk:
+    pitch_motif = workload.make_pitch_motif(rng, n)
+    scale = workload.make_scale(rng)
+    shift = rng.randrange(1, 12)
+    mapping = {pc: (pc + shift) % 12 for pc in scale}
+    return lambda: motif.rescale(pitch_motif, mapping)
+
+
+def _lead(rng: random.Random, n: int) -> Thunk:
+    pitch_motif = workload.make_pitch_motif(rng, n, chords=0.1, rests=0)
+    harmony = workload.make_harmony(rng)
+    return lambda: motif.lead(pitch_motif, harmony)
+
+
+def _thread(rng: random.Random, n: int) -> Thunk:
+    harmonies, durations = workload.make_progression(rng, n)
+    pitch_motif = workload.make_pitch_motif(rng, 2 * n)
+    duration_motif = workload.make_duration_motif(
+        rng, 2 * n, sum(durations)
+    )
+
+    return lambda: motif.thread(
+        pitch_motif, duration_motif, harmonies, durations, [-1, 0, 1]
+    )
+
+
+def _elaborate(rng: random.Random, n: int) -> Thunk:
+    pitch_motif = workload.make_pitch_motif(rng, n)
+    duration_motif = workload.make_duration_motif(rng, n)
+    scale = workload.make_scale(rng)
+
+    # refer to the last pitch
+    reference = max(
+        i for i, item in enumerate(pitch_motif)
+        if isinstance(item, int)
+    )
+
+    return lambda: motif.elaborate(
+        pitch_motif, duration_motif, reference, [1, -1], scale
+    )
+
+
+def _divide(rng: random.Random, n: int) -> Thunk:
+    pitch_motif = workload.make_pitch_motif(rng, n)
+    duration_motif = workload.make_duration_motif(rng, n)
+    return lambda: motif.divide(pitch_motif, duration_motif, max(2, n//8))
+
+
+def _is_similar(rng: random.Random, n: int) -> Thunk:
+    pitch_motif = workload.make_pitch_motif(rng, n)
+    proto = workload.make_pitch_motif(rng, n)
+    return lambda: motif.is_similar(pitch_motif, proto, 'ordinal')
+
+
+def _to_pitch_line(rng: random.Random, n: int) -> Thunk:
+    notation_line = workload.make_notation_line(rng, n)
+
+    # `to_pitch_line` works in place, so copying is timed as well
+    def thunk():
+        utils.to_pitch_line([
+            list(item) if isinstance(item, list) else item
+            for item in notation_line
+        ])
+
+    return thunk
+
+
+def _read_notation_lines(rng: random.Random, n: int) -> Thunk:
+    def to_token(item):
+        if isinstance(item, list):
+            return '[{}]'.format(' '.join(map(to_token, item)))
+        return '_' if item is None else str(item)
+
+    # records of eight items, about a third of them with chords,
+    # as `60 B-5 _ [61 c##2]`
+    records = [
+        ' '.join(map(to_token, workload.make_notation_line(rng, 8)))
+        for _ in range(n)
+    ]
+
+    return lambda: list(utils.read_notation_lines(records))
+
+
+def _make_lines(
+        rng: random.Random,
+        n: int
+    ) -> Tuple[List[motif.PitchLine], List[motif.DurationLine]]:
+
+    """
+    Make four voices of `n` notes, chords or rests.
+    """
+
+    pitch_lines = []
+    duration_lines = []
+
+    for low in [72, 60, 48, 36]:
+        duration_line = workload.make_duration_motif(rng, n)
+        pitch_line = workload.make_pitch_motif(
+            rng, n, low=low, high=low+12
+        )
+
+        pitch_lines.append(pitch_line)
+        duration_lines.append(duration_line)
+
+    return pitch_lines, duration_lines
+
+
+def _to_notation_lines(rng: random.Random, n: int) -> Thunk:
+    pitch_lines, _ = _make_lines(rng, n)
+    return lambda: utils.to_notation_lines(pitch_lines, -3)
+
+
+def _export_midi(rng: random.Random, n: int) -> Thunk:
+    pitch_lines, duration_lines = _make_lines(rng, n)
+
+    return lambda: utils.export_midi(
+        pitch_lines, duration_lines, path_or_buffer=io.BytesIO()
+    )
+
+
+def _to_musicxml(rng: random.Random, n: int) -> Thunk:
+    pitch_lines, duration_lines = _make_lines(rng, n)
+    return lambda: musicxml.to_musicxml(pitch_lines, duration_lines, 2)
+
+
+def _render(rng: random.Random, n: int) -> Thunk:
+    import music21 # raises ImportError to skip the case
+    pitch_lines, duration_lines = _make_lines(rng, n)
+    return lambda: utils.render(pitch_lines, duration_lines, 2)
+
+
+CASES: Dict[str, Case] = {
+    'transpose': (_transpose, [10, 100, 1000, 10000]),
+    'rescale': (_rescale, [10, 100, 1000, 10000]),
+    'lead': (_lead, [4, 6, 8, 10]),
+    'thread': (_thread, [2, 4, 6, 8]),
+    'elaborate': (_elaborate, [10, 100, 1000, 10000]),
+    'divide': (_divide, [10, 100, 1000, 10000]),
+    'is_similar': (_is_similar, [10, 100, 1000, 10000]),
+    'to_pitch_line': (_to_pitch_line, [10, 100, 1000, 10000]),
+    'to_notation_lines': (_to_notation_lines, [10, 100, 1000, 10000]),
+    'read_notation_lines': (_read_notation_lines, [10, 100, 1000, 10000]),
+    'export_midi': (_export_midi, [10, 100, 1000]),
+    'to_musicxml': (_to_musicxml, [10, 100, 1000]),
+    'render': (_render, [10, 50, 100])
+}
+
+
+
+# measure ------------------------------------------------------
+
+def _time(thunk: Thunk, repeat: int) -> float:
+
+    """
+    Get the shortest time of a call in seconds.
+    """
+
+    timer = timeit.Timer(thunk)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def _peak(thunk: Thunk) -> int:
+
+    """
+    Get the peak memory allocated during a call in bytes.
+    """
+
+    tracemalloc.start()
+
+    try:
+        thunk()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def _slope(points: List[Dict[str, float]]) -> Optional[float]:
+
+    """
+    Fit the exponent of time against size on a log-log scale.
+    """
+
+    if len(points) < 2:
+        return None
+
+    xs = [math.log(point['size']) for point in points]
+    ys = [math.log(point['seconds']) for point in points]
+    mx = sum(xs) / len(xs)
+    my = sum(ys) / len(ys)
+    sxx = sum((x - mx)**2 for x in xs)
+    sxy = sum((x - mx)*(y - my) for x, y in zip(xs, ys))
+    return sxy / sxx
+
+
+def run(
+        names: Optional[List[str]] = None,
+        seed: int = 0,
+        repeat: int = 3,
+        scale: float = 1
+    ) -> Dict[str, Any]:
+
+    """
+    Run the benchmarks, and return the results.
+
+    `scale` shrinks the default sizes of the cases that grow linearly,
+    for quick runs.
+    """
+
+    results = {}
+
+    for name in names or CASES:
+        setup, sizes = CASES[name]
+
+        if name not in ['lead', 'thread']:
+            sizes = sorted({max(1, int(size * scale)) for size in sizes})
+
+        points = []
+
+        for size in sizes:
+            # the same workload for each size in every run
+            rng = random.Random('{}-{}-{}'.format(seed, name, size))
+
+            try:
+                thunk = setup(rng, size)
+            except ImportError:
+                break
+
+            seconds = _time(thunk, repeat)
+
+            points.append({
+                'size': size,
+                'seconds': seconds,
+                'throughput': size / seconds,
+                'peak': _peak(thunk)
+            })
+
+            print(
+                '{:<20}{:>8}{:>14.3e} s{:>14.0f} /s{:>12} B'.format(
+                    name, size, seconds, size / seconds, points[-1]['peak']
+                ),
+                file=sys.stderr
+            )
+
+        if points:
+            results[name] = {'points': points, 'slope': _slope(points)}
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'repeat': repeat,
+            'date': datetime.now(timezone.utc).isoformat()
+        },
+        'results': results
+    }
+
+
+
+# compare ------------------------------------------------------
+
+def compare(
+        results: Dict[str, Any],
+        baseline: Dict[str, Any],
+        threshold: float = 0.25
+    ) -> List[str]:
+
+    """
+    Compare results with a baseline, size by size,
+    and return the cases more than `threshold` slower.
+    """
+
+    regressions = []
+
+    for name, result in results['results'].items():
+        if name not in baseline['results']:
+            continue
+
+        before = {
+            point['size']: point['seconds']
+            for point in baseline['results'][name]['points']
+        }
+
+        for point in result['points']:
+            size = point['size']
+
+            if size not in before:
+                continue
+
+            ratio = point['seconds'] / before[size]
+            flag = ''
+
+            if ratio > 1 + threshold:
+                flag = 'slower'
+                regressions.append('{} ({})'.format(name, size))
+            elif ratio < 1 / (1 + threshold):
+                flag = 'faster'
+
+            print(
+                '{:<20}{:>8}{:>10.2f}x  {}'.format(name, size, ratio, flag)
+            )
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('names', nargs='*',
+        help='the cases to run, all by default: ' + ', '.join(CASES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--scale', type=float, default=1,
+        help='shrink the sizes of linear cases for quick runs')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare with this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25,
+        help='the allowed slowdown, 0.25 by default')
+    args = parser.parse_args(argv)
+
+    for name in args.names:
+        if name not in CASES:
+            parser.error('unknown case: {}'.format(name))
+
+    results = run(args.names, args.seed, args.repeat, args.scale)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+        regressions = compare(results, baseline, args.threshold)
+
+        if regressions:
+            print('slower: ' + ', '.join(regressions))
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Generate seeded, synthetic workloads for the benchmarks.
+"""
+
+import random
+from typing import List, Tuple, Optional
+from ch0p1n.motif import PitchClass, PitchLine, DurationLine
+from ch0p1n.utils import to_notation_lines
+
+Harmony = List[PitchClass]
+
+
+
+# pitch and duration motifs ------------------------------------
+
+_QUALITIES = [
+    [0, 4, 7],
+    [0, 3, 7],
+    [0, 4, 7, 10],
+    [0, 3, 7, 10],
+    [0, 3, 6]
+]
+# major, minor, dominant seventh, minor seventh and diminished
+
+_MAJOR = [0, 2, 4, 5, 7, 9, 11]
+
+_VALUES = [1/4, 1/2, 1/2, 1, 1, 1, 3/2, 2]
+
+
+def make_pitch_motif(
+        rng: random.Random,
+        n: int,
+        chords: float = 0.15,
+        rests: float = 0.1,
+        low: int = 48,
+        high: int = 84
+    ) -> PitchLine:
+
+    """
+    Make a pitch motif of `n` items, which moves mostly by steps,
+    with some chords and rests.
+    """
+
+    pitch_motif = []
+    pitch = rng.randint(low, high)
+
+    for _ in range(n):
+        pitch = pitch + rng.choice([-4, -2, -1, -1, 1, 1, 2, 4])
+        pitch = min(max(pitch, low), high)
+        r = rng.random()
+
+        if r < rests:
+            pitch_motif.append(None)
+        elif r < rests + chords:
+            size = rng.randint(2, 4)
+            chord = sorted({pitch - rng.choice([3, 4, 7, 12]) * k
+                for k in range(size)})
+            pitch_motif.append(chord)
+        else:
+            pitch_motif.append(pitch)
+
+    # the first item is a pitch, so that motifs can be referred to
+    if not isinstance(pitch_motif[0], int):
+        pitch_motif[0] = pitch
+
+    return pitch_motif
+
+
+def make_duration_motif(
+        rng: random.Random,
+        n: int,
+        total: Optional[float] = None
+    ) -> DurationLine:
+
+    """
+    Make a duration motif of `n` durations,
+    scaled to `total` if given.
+    """
+
+    duration_motif = [rng.choice(_VALUES) for _ in range(n)]
+
+    if total is not None:
+        ratio = total / sum(duration_motif)
+        duration_motif = [duration * ratio for duration in duration_motif]
+
+    return duration_motif
+
+
+def make_notation_line(rng: random.Random, n: int) -> list:
+
+    """
+    Make a line of notations, MIDI note numbers and rests,
+    as `to_pitch_line` takes it.
+    """
+
+    pitch_line = make_pitch_motif(rng, n)
+    notation_line = to_notation_lines([pitch_line], rng.randint(-7, 7))[0]
+    return notation_line
+
+
+
+# harmonies ----------------------------------------------------
+
+def make_harmony(rng: random.Random) -> Harmony:
+
+    """
+    Make a chord of a random quality on a random root.
+    """
+
+    root = rng.randrange(12)
+    harmony = [(root + pc) % 12 for pc in rng.choice(_QUALITIES)]
+    return harmony
+
+
+def make_scale(rng: random.Random) -> Harmony:
+
+    """
+    Make a major scale on a random tonic.
+    """
+
+    tonic = rng.randrange(12)
+    scale = [(tonic + pc) % 12 for pc in _MAJOR]
+    return scale
+
+
+def make_progression(
+        rng: random.Random,
+        n: int,
+        length: float = 2
+    ) -> Tuple[List[Harmony], DurationLine]:
+
+    """
+    Make `n` harmonies, and their durations,
+    each `length` quarter notes long.
+    """
+
+    harmonies = [make_harmony(rng) for _ in range(n)]
+    durations = [length] * n
+    return harmonies, durations
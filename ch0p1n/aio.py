@@ -0,0 +1,188 @@
+"""
+Generate and render motifs from asyncio code
+without blocking the event loop.
+
+Examples
+--------
+>>> async def main():
+...     async for motifs in alead([60, 64, 67], [5, 9, 0], chunksize=2):
+...         print(motifs)
+>>> asyncio.run(main())
+[[57, 60, 65], [60, 65, 69]]
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Executor
+from typing import (
+    Union, List, Optional, Tuple, Iterator, Iterable, AsyncIterator
+)
+from ch0p1n.motif import (
+    PitchClass, PitchLine, DurationLine, ilead, ithread
+)
+from ch0p1n.utils import render
+
+Variant = Tuple[List[PitchLine], List[DurationLine]]
+
+
+
+# iterate in executors -----------------------------------------
+
+def _take(
+        iterator: Iterator,
+        n: int,
+        lock: threading.Lock,
+        stop: threading.Event
+    ) -> list:
+
+    """
+    Take up to `n` items from an iterator,
+    or fewer if stopped, closing the iterator then.
+    """
+
+    chunk = []
+
+    with lock:
+        if not stop.is_set():
+            for item in iterator:
+                chunk.append(item)
+
+                if len(chunk) == n or stop.is_set():
+                    break
+
+        if stop.is_set():
+            iterator.close()
+
+    return chunk
+
+
+async def _iterate(
+        iterator: Iterator,
+        chunksize: int,
+        executor: Optional[Executor],
+        stop: Optional[threading.Event] = None
+    ) -> AsyncIterator[list]:
+
+    """
+    Run a generator in an executor a chunk at a time,
+    taking the next chunk only when the last one is consumed.
+
+    The generator is closed when the iteration ends or is cancelled,
+    after the chunk in progress, which stops early.
+    `stop` is set then, so that a generator given it
+    can also stop between items.
+    Since the generator is kept between chunks,
+    the executor must run in this process, such as a thread pool.
+    """
+
+    loop = asyncio.get_running_loop()
+    lock = threading.Lock()
+
+    if stop is None:
+        stop = threading.Event()
+
+    try:
+        while True:
+            chunk = await loop.run_in_executor(
+                executor, _take, iterator, chunksize, lock, stop
+            )
+
+            if not chunk:
+                return
+
+            yield chunk
+    finally:
+        stop.set()
+
+        # otherwise the chunk in progress closes it
+        if lock.acquire(blocking=False):
+            try:
+                iterator.close()
+            finally:
+                lock.release()
+
+
+
+# generate -----------------------------------------------------
+
+def alead(
+        pitch_motif: PitchLine,
+        harmony: List[PitchClass],
+        steps: List[int] = [-1, 0, 1],
+        complete: bool = True,
+        similar: Optional[str] = 'direction',
+        chunksize: int = 256,
+        executor: Optional[Executor] = None
+    ) -> AsyncIterator[List[PitchLine]]:
+
+    """
+    `motif.lead` as an async iterator of lists of up to `chunksize`
+    motifs, generated in `executor`, or the loop's default executor.
+
+    Motifs are generated as they are consumed,
+    and generation stops when the iteration is cancelled.
+    """
+
+    # stop the search itself, which may run long between motifs
+    stop = threading.Event()
+    iterator = ilead(pitch_motif, harmony, steps, complete, similar, stop)
+    return _iterate(iterator, chunksize, executor, stop)
+
+
+def athread(
+        pitch_motif: PitchLine,
+        duration_motif: DurationLine,
+        harmonies: List[List[PitchClass]],
+        durations: DurationLine,
+        steps: List[int],
+        chunksize: int = 256,
+        executor: Optional[Executor] = None
+    ) -> AsyncIterator[List[PitchLine]]:
+
+    """
+    `motif.thread` as an async iterator. See `alead`.
+    """
+
+    iterator = ithread(
+        pitch_motif, duration_motif, harmonies, durations, steps
+    )
+
+    return _iterate(iterator, chunksize, executor)
+
+
+
+# render -------------------------------------------------------
+
+async def arender(
+        variants: Union[Iterable[Variant], AsyncIterator[Variant]],
+        group: int = 1,
+        key: int = 0,
+        meter: str = '4/4',
+        clefs: List[str] = ['g', 'f'],
+        fmt: str = 'musicxml', # 'midi'
+        executor: Optional[Executor] = None
+    ) -> AsyncIterator[bytes]:
+
+    """
+    Render variants of music, each a pair of pitch lines and
+    duration lines, one at a time in `executor`,
+    yielding the bytes of each. See `utils.render`.
+
+    `variants` can be an async iterator,
+    and the executor can be a process pool.
+    """
+
+    loop = asyncio.get_running_loop()
+
+    if hasattr(variants, '__aiter__'):
+        async for pitch_lines, duration_lines in variants:
+            yield await loop.run_in_executor(
+                executor, render, pitch_lines, duration_lines,
+                group, key, meter, clefs, fmt
+            )
+    else:
+        for pitch_lines, duration_lines in variants:
+            yield await loop.run_in_executor(
+                executor, render, pitch_lines, duration_lines,
+                group, key, meter, clefs, fmt
+            )
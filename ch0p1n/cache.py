@@ -0,0 +1,317 @@
+"""
+Keep the motifs that `lead` and `thread` generate on disk.
+
+Examples
+--------
+>>> cache = DiskCache('.ch0p1n-cache')
+>>> motifs = cache.lead([60, 64, 67], [5, 9, 0]) # generated
+>>> motifs = cache.lead([60, 64, 67], [5, 9, 0]) # read from disk
+"""
+
+import os
+import json
+import zlib
+import pickle
+import hashlib
+import tempfile
+from typing import List, Optional, Any
+from ch0p1n import motif
+from ch0p1n.motif import PitchClass, PitchLine, DurationLine, _as_line
+
+_SUFFIX = '.pkl.z'
+
+_version = None
+# the hash of the sources of `motif`, see `_get_version`
+
+
+
+# keys ---------------------------------------------------------
+
+def _get_version() -> str:
+
+    """
+    Get a hash of the source code that generates motifs,
+    so that results of earlier code are not read.
+    """
+
+    global _version
+
+    if _version is None:
+        with open(motif.__file__, 'rb') as file:
+            _version = hashlib.sha256(file.read()).hexdigest()
+
+    return _version
+
+
+def _normalize(pitch_motif: PitchLine) -> PitchLine:
+
+    """
+    Get a pitch motif of any representation
+    as a pitch line with chords as lists.
+    """
+
+    return [
+        list(item) if isinstance(item, (list, tuple)) else item
+        for item in _as_line(pitch_motif)
+    ]
+
+
+def _get_key(name: str, *args: Any) -> str:
+
+    """
+    Hash a function's name and normalized arguments,
+    together with the version of the code.
+    """
+
+    data = json.dumps([_get_version(), name, args], separators=(',', ':'))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+
+# cache --------------------------------------------------------
+
+class DiskCache:
+
+    """
+    A content-addressed cache of results in a directory,
+    one zlib-compressed pickle per result.
+
+    Files are written to temporary files and renamed into place,
+    so that processes sharing a directory never read partial results.
+    Once the files exceed `max_size` bytes,
+    the least recently read or written ones are removed.
+    The total size is scanned once and then kept as files are written,
+    and the directory is scanned again only when it may exceed the limit.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            max_size: int = 1 << 30
+        ):
+
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+        # the total size, at least as large as it is unless
+        # other processes write to the directory
+        self._size = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + _SUFFIX)
+
+    def _files(self) -> List[os.DirEntry]:
+        entries = []
+
+        for sub in os.scandir(self.directory):
+            if sub.is_dir():
+                entries.extend(
+                    entry for entry in os.scandir(sub.path)
+                    if entry.name.endswith(_SUFFIX)
+                )
+
+        return entries
+
+    def get(self, key: str, default: Any = None) -> Any:
+
+        """
+        Get the result stored under a key, or `default`.
+        """
+
+        path = self._path(key)
+
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+
+            value = pickle.loads(zlib.decompress(data))
+        except FileNotFoundError:
+            return default
+        except Exception:
+            # a file that can not be read or unpickled is dropped
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+            return default
+
+        # mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+
+        """
+        Store a result under a key.
+        """
+
+        if self._size is None:
+            self._size = self.size
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+            raise
+
+        self._size = self._size + len(data)
+
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self) -> None:
+
+        """
+        Remove the least recently used files until the cache fits.
+        """
+
+        entries = []
+
+        for entry in self._files():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry[1] for entry in entries)
+
+        for _, n, path in sorted(entries):
+            if size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+            size = size - n
+
+        self._size = size
+
+    def clear(self) -> None:
+
+        """
+        Remove all stored results.
+        """
+
+        for entry in self._files():
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+
+        """
+        The total size of the stored results in bytes.
+        """
+
+        total = 0
+
+        for entry in self._files():
+            try:
+                total = total + entry.stat().st_size
+            except OSError:
+                pass
+
+        return total
+
+    def __len__(self) -> int:
+        return len(self._files())
+
+    # cached functions ---------------------------------------------
+
+    def lead(
+            self,
+            pitch_motif: PitchLine,
+            harmony: List[PitchClass],
+            steps: List[int] = [-1, 0, 1],
+            complete: bool = True,
+            similar: Optional[str] = 'direction',
+            workers: Optional[int] = None,
+            chunksize: Optional[int] = None
+        ) -> List[PitchLine]:
+
+        """
+        `motif.lead`, read from the cache if called before.
+        Motifs of any representation are taken as pitch lines.
+        """
+
+        pitch_motif = _normalize(pitch_motif)
+
+        key = _get_key(
+            'lead', pitch_motif, sorted(set(harmony)), list(steps),
+            complete, similar
+        )
+
+        motifs = self.get(key)
+
+        if motifs is None:
+            motifs = motif.lead(
+                pitch_motif, harmony, steps, complete, similar,
+                workers, chunksize
+            )
+
+            self.set(key, motifs)
+
+        return motifs
+
+    def thread(
+            self,
+            pitch_motif: PitchLine,
+            duration_motif: DurationLine,
+            harmonies: List[List[PitchClass]],
+            durations: DurationLine,
+            steps: List[int],
+            workers: Optional[int] = None,
+            chunksize: Optional[int] = None
+        ) -> List[PitchLine]:
+
+        """
+        `motif.thread`, read from the cache if called before.
+        Motifs of any representation are taken as pitch lines.
+        """
+
+        pitch_motif = _normalize(pitch_motif)
+
+        key = _get_key(
+            'thread', pitch_motif, list(duration_motif),
+            [sorted(set(harmony)) for harmony in harmonies],
+            list(durations), list(steps)
+        )
+
+        motifs = self.get(key)
+
+        if motifs is None:
+            motifs = motif.thread(
+                pitch_motif, list(duration_motif), harmonies,
+                list(durations), steps, workers, chunksize
+            )
+
+            self.set(key, motifs)
+
+        return motifs
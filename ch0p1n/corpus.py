@@ -0,0 +1,337 @@
+"""
+Store motifs in a compact binary file, and read them by index
+without loading the file.
+
+Format
+------
+All numbers are little-endian.
+
+The file starts with a header of 32 bytes:
+
+    magic      8 bytes   b'CH0PCORP'
+    version    uint16    1
+    flags      uint16    1 if records have durations, otherwise 0
+    ticks      uint32    ticks per quarter note
+    count      uint64    the number of records
+    table      uint64    the position of the offset table
+
+Records follow the header one after another, each made of
+
+    n          uint16          the number of items
+    offsets    uint16[n+1]     where each item's pitches start and end
+    chords     int8[n]         1 if an item is a chord, otherwise 0
+    pitches    int8[...]       MIDI note numbers, -1 for rests
+    durations  int32[n]        durations in ticks, if flagged
+
+The offset table, aligned to 8 bytes, holds `count + 1` uint64
+positions of the records, the last one being the end of the records.
+
+Examples
+--------
+>>> from ch0p1n.motif import ilead
+>>> with CorpusWriter('motifs.corpus', durations=False) as writer:
+...     writer.extend(ilead([60, 64, 67], [5, 9, 0]))
+>>> with Corpus('motifs.corpus') as corpus:
+...     corpus[0]
+([57, 60, 65], None)
+"""
+
+import sys
+import mmap
+import struct
+import shutil
+import tempfile
+from array import array
+from typing import Union, List, Optional, Tuple, Iterable, Iterator
+from ch0p1n.motif import (
+    REST, PitchLine, DurationLine, MotifArray, _as_line
+)
+
+_MAGIC = b'CH0PCORP'
+_VERSION = 1
+_HEADER = struct.Struct('<8sHHIQQ')
+_OFFSET = struct.Struct('<Q')
+
+Record = Tuple[PitchLine, Optional[DurationLine]]
+
+
+def _to_bytes(numbers: array) -> bytes:
+
+    """
+    Get the little-endian bytes of an array.
+    """
+
+    if sys.byteorder == 'big':
+        numbers = array(numbers.typecode, numbers)
+        numbers.byteswap()
+
+    return numbers.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+
+    """
+    Read an array from little-endian bytes.
+    """
+
+    numbers = array(typecode)
+    numbers.frombytes(data)
+
+    if sys.byteorder == 'big':
+        numbers.byteswap()
+
+    return numbers
+
+
+
+# write --------------------------------------------------------
+
+class CorpusWriter:
+
+    """
+    Append motifs to a corpus file one at a time.
+
+    The offset table is kept in a temporary file until `close`,
+    so that memory use does not grow with the number of motifs.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            ticks: int = 480,
+            durations: bool = True
+        ):
+
+        self.ticks = ticks
+        self.durations = durations
+        self.count = 0
+        self.file = open(path, 'wb')
+        self.file.write(b'\0' * _HEADER.size)
+        self.position = _HEADER.size
+        self.table = tempfile.TemporaryFile()
+        self.table.write(_OFFSET.pack(self.position))
+
+    def append(
+            self,
+            pitch_motif: PitchLine,
+            duration_motif: Optional[DurationLine] = None
+        ) -> None:
+
+        """
+        Append a motif, with its durations if the corpus has durations.
+        """
+
+        if isinstance(pitch_motif, MotifArray):
+            pitch_motif, durations = pitch_motif.to_lines()
+
+            if duration_motif is None:
+                duration_motif = durations
+        else:
+            pitch_motif = _as_line(pitch_motif)
+
+        n = len(pitch_motif)
+        offsets = array('L', [0])
+        chords = array('b')
+        pitches = array('h')
+
+        for item in pitch_motif:
+            if isinstance(item, (list, tuple)):
+                pitches.extend(REST if p is None else p for p in item)
+                chords.append(1)
+            else:
+                pitches.append(REST if item is None else item)
+                chords.append(0)
+
+            offsets.append(len(pitches))
+
+        if (n > 0xffff) or (offsets[-1] > 0xffff):
+            raise ValueError('A motif can have at most 65535 pitches.')
+
+        if not all(REST <= pitch <= 127 for pitch in pitches):
+            raise ValueError('Pitches must be in 0-127 or None.')
+
+        data = [
+            struct.pack('<H', n),
+            _to_bytes(array('H', offsets)),
+            chords.tobytes(),
+            array('b', pitches).tobytes()
+        ]
+
+        if self.durations:
+            if duration_motif is None or len(duration_motif) != n:
+                raise ValueError('A duration is needed for each item.')
+
+            ticks = array('i')
+
+            for duration in duration_motif:
+                tick = round(duration * self.ticks)
+
+                if abs(tick - duration*self.ticks) > 1e-6:
+                    raise ValueError(
+                        '{} is not a whole number of ticks.'.format(duration)
+                    )
+
+                ticks.append(tick)
+
+            data.append(_to_bytes(ticks))
+
+        data = b''.join(data)
+        self.file.write(data)
+        self.position = self.position + len(data)
+        self.table.write(_OFFSET.pack(self.position))
+        self.count = self.count + 1
+
+    def extend(
+            self,
+            pitch_motifs: Iterable[PitchLine],
+            duration_motif: Optional[DurationLine] = None
+        ) -> None:
+
+        """
+        Append motifs, such as those `ilead` or `ithread` yields,
+        all with the same durations if given.
+        """
+
+        for pitch_motif in pitch_motifs:
+            self.append(pitch_motif, duration_motif)
+
+    def close(self) -> None:
+
+        """
+        Write the offset table and the header, and close the file.
+        """
+
+        if self.file.closed:
+            return
+
+        # align the table
+        padding = -self.position % 8
+        self.file.write(b'\0' * padding)
+        table = self.position + padding
+
+        self.table.seek(0)
+        shutil.copyfileobj(self.table, self.file)
+        self.table.close()
+
+        self.file.seek(0)
+        self.file.write(_HEADER.pack(
+            _MAGIC, _VERSION, int(self.durations), self.ticks,
+            self.count, table
+        ))
+
+        self.file.close()
+
+    def __enter__(self) -> 'CorpusWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+
+# read ---------------------------------------------------------
+
+class Corpus:
+
+    """
+    Read a corpus file through a memory map.
+
+    Indexing with an integer reads a record,
+    a pair of a pitch line and a duration line, or None,
+    and indexing with a slice reads a list of records.
+    With `motif_array`, records are read as motif arrays.
+    """
+
+    def __init__(self, path: str, motif_array: bool = False):
+        self.motif_array = motif_array
+
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, flags, self.ticks, self.count, table = \
+            _HEADER.unpack_from(self.map)
+
+        if magic != _MAGIC or version != _VERSION:
+            self.map.close()
+            raise ValueError('Not a corpus file: {}'.format(path))
+
+        self.durations = bool(flags & 1)
+        self.table = table
+
+    def _read(self, i: int) -> Union[Record, MotifArray]:
+        buffer = self.map
+        start, = _OFFSET.unpack_from(buffer, self.table + 8*i)
+        n, = struct.unpack_from('<H', buffer, start)
+        k = start + 2
+
+        offsets = _from_bytes('H', buffer[k:k + 2*(n+1)])
+        k = k + 2*(n+1)
+
+        chords = array('B', buffer[k:k + n])
+        k = k + n
+
+        pitches = array('b', buffer[k:k + offsets[-1]])
+        k = k + offsets[-1]
+
+        durations = None
+
+        if self.durations:
+            durations = [
+                tick / self.ticks
+                for tick in _from_bytes('i', buffer[k:k + 4*n])
+            ]
+
+        if self.motif_array:
+            # pitches are stored as bytes, but motif arrays hold shorts
+            return MotifArray(
+                array('h', pitches),
+                offsets,
+                chords,
+                None if durations is None else array('d', durations)
+            )
+
+        pitch_line = []
+
+        for j in range(n):
+            if chords[j]:
+                pitch_line.append([
+                    None if p == REST else p
+                    for p in pitches[offsets[j]:offsets[j+1]]
+                ])
+            else:
+                p = pitches[offsets[j]]
+                pitch_line.append(None if p == REST else p)
+
+        return pitch_line, durations
+
+    def __getitem__(
+            self,
+            i: Union[int, slice]
+        ) -> Union[Record, MotifArray, List[Union[Record, MotifArray]]]:
+
+        if isinstance(i, slice):
+            return [self._read(j) for j in range(*i.indices(self.count))]
+
+        if i < 0:
+            i = i + self.count
+
+        if not 0 <= i < self.count:
+            raise IndexError('corpus index out of range')
+
+        return self._read(i)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Union[Record, MotifArray]]:
+        for i in range(self.count):
+            yield self._read(i)
+
+    def close(self) -> None:
+        self.map.close()
+
+    def __enter__(self) -> 'Corpus':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,251 @@
+"""
+Drop repeated motifs from streams of variants.
+"""
+
+import math
+from hashlib import blake2b
+from typing import List, Optional, Union, Iterator, Iterable, Hashable
+from ch0p1n.motif import (
+    Pitch, PitchClass, PitchLine, PitchMotif, _as_line, _extract, _reify
+)
+
+
+
+# canonical forms ----------------------------------------------
+
+def transposed(pitch_motif: PitchLine, reference: Pitch = 60) -> PitchMotif:
+
+    """
+    Transpose a pitch motif chromatically,
+    so that its first pitch becomes `reference`.
+
+    Motifs that are transpositions of each other
+    have the same transposed form.
+
+    Examples
+    --------
+    >>> transposed([62, None, [64, 69]])
+    PitchMotif([60, None, [62, 67]])
+    """
+
+    pitch_motif = _as_line(pitch_motif)
+    pitches = [pitch for pitch in _extract(pitch_motif) if pitch is not None]
+
+    if not pitches:
+        return PitchMotif(pitch_motif)
+
+    d = reference - pitches[0]
+
+    pitch_motif = [
+        [pitch + d for pitch in item] if isinstance(item, list)
+        else (item if item is None else item + d)
+        for item in pitch_motif
+    ]
+
+    return PitchMotif(pitch_motif)
+
+
+def to_degrees(
+        pitch_motif: PitchLine,
+        harmony: List[PitchClass]
+    ) -> PitchMotif:
+
+    """
+    Get the degrees of a pitch motif's pitches in a harmony,
+    counted from the degree of its first pitch.
+
+    A pitch off the harmony takes the half degree between
+    its neighbouring degrees.
+    Motifs that are transpositions of each other along the harmony
+    have the same degrees.
+
+    Examples
+    --------
+    >>> to_degrees([64, 67, [72, 74]], [0, 4, 7])
+    PitchMotif([0, 1, [2, 2.5]])
+    """
+
+    pitch_motif = _as_line(pitch_motif)
+    scale = _reify(harmony)
+
+    def locate(pitch):
+        i, on = scale.locate(pitch)
+        return i if on else i - 0.5
+
+    pitches = [pitch for pitch in _extract(pitch_motif) if pitch is not None]
+
+    if not pitches:
+        return PitchMotif(pitch_motif)
+
+    first = locate(pitches[0])
+
+    degrees = [
+        [locate(pitch) - first for pitch in item] if isinstance(item, list)
+        else (item if item is None else locate(item) - first)
+        for item in pitch_motif
+    ]
+
+    return PitchMotif(degrees)
+
+
+
+# filters ------------------------------------------------------
+
+class ExactFilter:
+
+    """
+    Remember keys in a set.
+    """
+
+    def __init__(self):
+        self.keys = set()
+
+    def add(self, key: Hashable) -> bool:
+
+        """
+        Add a key, and return whether it is new.
+        """
+
+        n = len(self.keys)
+        self.keys.add(key)
+        return len(self.keys) > n
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class BloomFilter:
+
+    """
+    Remember keys in a fixed number of bits.
+
+    A key that was never added may be taken as added,
+    with a probability of about `error` once `capacity` keys are added,
+    but an added key is never taken as new.
+    """
+
+    def __init__(self, capacity: int, error: float = 0.01):
+        self.size = max(8, math.ceil(
+            -capacity * math.log(error) / math.log(2)**2
+        ))
+        self.k = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _indices(self, key: Hashable) -> List[int]:
+
+        """
+        Get the bits of a key by double hashing
+        a digest of its representation.
+        """
+
+        digest = blake2b(repr(key).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+
+        return [(h1 + i*h2) % self.size for i in range(self.k)]
+
+    def add(self, key: Hashable) -> bool:
+
+        """
+        Add a key, and return whether it is new.
+        """
+
+        new = False
+
+        for i in self._indices(key):
+            byte, bit = divmod(i, 8)
+
+            if not self.bits[byte] >> bit & 1:
+                self.bits[byte] = self.bits[byte] | (1 << bit)
+                new = True
+
+        if new:
+            self.count = self.count + 1
+
+        return new
+
+    def __contains__(self, key: Hashable) -> bool:
+        return all(
+            self.bits[i // 8] >> (i % 8) & 1
+            for i in self._indices(key)
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+
+
+# deduplicate --------------------------------------------------
+
+def _dedup(
+        pitch_motifs: Iterable[PitchLine],
+        canonical: Optional[str],
+        harmony: Optional[List[PitchClass]],
+        seen: Union[ExactFilter, BloomFilter]
+    ) -> Iterator[PitchLine]:
+
+    """
+    Yield the pitch motifs whose keys are new to `seen`.
+    """
+
+    for pitch_motif in pitch_motifs:
+        if canonical == 'transposition':
+            key = transposed(pitch_motif)
+        elif canonical == 'degree':
+            key = to_degrees(pitch_motif, harmony)
+        else:
+            key = PitchMotif(_as_line(pitch_motif))
+
+        if seen.add(key):
+            yield pitch_motif
+
+
+def dedup(
+        pitch_motifs: Iterable[PitchLine],
+        canonical: Optional[str] = None, # 'transposition', 'degree'
+        harmony: Optional[List[PitchClass]] = None,
+        capacity: Optional[int] = None,
+        error: float = 0.01
+    ) -> Iterator[PitchLine]:
+
+    """
+    Yield the first of each group of equal pitch motifs,
+    lazily and in order.
+
+    Parameters
+    ----------
+    canonical: str, optional
+        Take motifs as equal if they are transpositions of each other,
+        chromatically with `'transposition'`,
+        or along `harmony` with `'degree'`.
+    capacity: int, optional
+        The number of distinct motifs expected.
+        If given, motifs are remembered in bounded memory,
+        at the cost of dropping a new motif
+        with a probability of about `error`.
+        Otherwise, all distinct motifs are remembered exactly.
+
+    Arguments are checked when called, before any motif is read.
+
+    Examples
+    --------
+    >>> list(dedup([[60, 64], [60, 64], [62, 66]], 'transposition'))
+    [[60, 64]]
+    """
+
+    if canonical not in (None, 'transposition', 'degree'):
+        raise ValueError('Unknown canonical form: {}'.format(canonical))
+
+    if (canonical == 'degree') and (harmony is None):
+        raise ValueError("A harmony is needed for canonical form 'degree'.")
+
+    if capacity is None:
+        seen = ExactFilter()
+    else:
+        seen = BloomFilter(capacity, error)
+
+    return _dedup(pitch_motifs, canonical, harmony, seen)
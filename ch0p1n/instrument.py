@@ -0,0 +1,150 @@
+"""
+Count and time the stages of generation.
+
+Recording is off unless enabled, in which case the instrumented
+functions only check a global and call through.
+
+Examples
+--------
+>>> from ch0p1n import instrument
+>>> from ch0p1n.motif import lead
+>>> with instrument.record() as recorder:
+...     motifs = lead([60, 64, 67], [5, 9, 0])
+>>> recorder.to_dict()['counters']['motif._search.nodes']
+13
+"""
+
+import json
+from time import perf_counter
+from functools import wraps
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, Optional
+
+
+
+# record -------------------------------------------------------
+
+class Recorder:
+
+    """
+    Counters and timers of named stages.
+
+    Timers keep the number of calls and the total wall time in seconds.
+    Only the current process is recorded,
+    so work done in worker processes is not.
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        self.timers: Dict[str, list] = {}
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add(self, name: str, seconds: float) -> None:
+        timer = self.timers.get(name)
+
+        if timer is None:
+            self.timers[name] = [1, seconds]
+        else:
+            timer[0] = timer[0] + 1
+            timer[1] = timer[1] + seconds
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.timers.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        timers = {
+            name: {'calls': calls, 'seconds': seconds}
+            for name, (calls, seconds) in self.timers.items()
+        }
+
+        return {'counters': dict(self.counters), 'timers': timers}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def __repr__(self) -> str:
+        return 'Recorder({})'.format(self.to_dict())
+
+
+_recorder: Optional[Recorder] = None
+# the recorder in use, if recording
+
+
+def enable() -> Recorder:
+
+    """
+    Start recording in a new recorder, and return it.
+    """
+
+    global _recorder
+    _recorder = Recorder()
+    return _recorder
+
+
+def disable() -> None:
+
+    """
+    Stop recording.
+    """
+
+    global _recorder
+    _recorder = None
+
+
+def get_recorder() -> Optional[Recorder]:
+
+    """
+    Get the recorder in use, or None if not recording.
+    """
+
+    return _recorder
+
+
+@contextmanager
+def record() -> Iterator[Recorder]:
+
+    """
+    Record within a `with` block,
+    restoring the previous recorder, if any, on exit.
+    """
+
+    global _recorder
+    previous = _recorder
+    _recorder = Recorder()
+
+    try:
+        yield _recorder
+    finally:
+        _recorder = previous
+
+
+
+# instrument ---------------------------------------------------
+
+def timed(function: Callable) -> Callable:
+
+    """
+    Time each call of a function while recording,
+    under its module and function names, such as `motif.lead`.
+    """
+
+    name = function.__module__.split('.')[-1] + '.' + function.__name__
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        recorder = _recorder
+
+        if recorder is None:
+            return function(*args, **kwargs)
+
+        start = perf_counter()
+
+        try:
+            return function(*args, **kwargs)
+        finally:
+            recorder.add(name, perf_counter() - start)
+
+    return wrapper
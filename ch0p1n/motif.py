@@ -2,9 +2,19 @@
 Elaborate and repeat (vary) motifs.
 """
 
-from typing import Union, List, Optional, Dict, Tuple, Any
-from copy import deepcopy
-from itertools import product, chain
+from typing import (
+    Union, List, Optional, Dict, Tuple, Any, Iterator, Iterable, Callable
+)
+from itertools import product, chain, accumulate
+from bisect import bisect_left, bisect_right, insort
+from array import array
+from functools import wraps
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from threading import Event, Lock
+from time import perf_counter
+from ch0p1n import instrument
+from ch0p1n.instrument import timed
 
 Pitch = int
 PitchClass = int
@@ -19,28 +29,506 @@ DurationLine = List[Duration]
 
 
 
+# store motifs in flat arrays ----------------------------------
+
+REST = -1
+# the pitch that stands for `None` in motif arrays
+
+
+class MotifArray:
+
+    """
+    A motif stored in flat arrays rather than nested lists.
+
+    `pitches` holds the pitches of all items in order,
+    with `REST` in place of `None`, as signed shorts,
+    so that pitches moved above the MIDI range, up to 131,
+    the top of a scale, still fit.
+    Item `i` spans `pitches[offsets[i]:offsets[i+1]]`,
+    and is a chord if `chords[i]` is `1`,
+    which tells `[60]` from `60`.
+    `durations` holds the duration of each item as a float,
+    so integer and fractional durations come back as floats,
+    and is `None` for a pitch motif alone.
+
+    Each array has a fixed overhead of about 80 bytes,
+    so short motifs take more memory than as nested lists,
+    while long motifs take a fraction of it.
+    """
+
+    __slots__ = ('pitches', 'offsets', 'chords', 'durations')
+
+    def __init__(
+            self,
+            pitches: array,
+            offsets: array,
+            chords: array,
+            durations: Optional[array] = None
+        ) -> None:
+
+        self.pitches = pitches
+        self.offsets = offsets
+        self.chords = chords
+        self.durations = durations
+
+    @classmethod
+    def from_lines(
+            cls,
+            pitch_motif: PitchLine,
+            duration_motif: Optional[DurationLine] = None
+        ) -> 'MotifArray':
+
+        """
+        Convert a pitch motif and a duration motif to a motif array.
+        """
+
+        pitches = []
+        offsets = [0]
+        chords = []
+
+        for item in pitch_motif:
+            if isinstance(item, list):
+                pitches.extend(REST if p is None else p for p in item)
+                chords.append(1)
+            else:
+                pitches.append(REST if item is None else item)
+                chords.append(0)
+
+            offsets.append(len(pitches))
+
+        # build each array at once, so that none is overallocated
+        pitches = array('h', pitches)
+        offsets = array('H' if len(pitches) <= 0xffff else 'L', offsets)
+        chords = array('B', chords)
+
+        if duration_motif is not None:
+            duration_motif = array('d', duration_motif)
+
+        return cls(pitches, offsets, chords, duration_motif)
+
+    def to_lines(self) -> Tuple[PitchLine, Optional[DurationLine]]:
+
+        """
+        Convert a motif array to a pitch motif and a duration motif.
+        """
+
+        pitches = self.extract()
+        offsets = self.offsets
+
+        pitch_motif = [
+            pitches[offsets[i]:offsets[i+1]] if chord
+            else pitches[offsets[i]]
+            for i, chord in enumerate(self.chords)
+        ]
+
+        duration_motif = self.durations
+
+        if duration_motif is not None:
+            duration_motif = duration_motif.tolist()
+
+        return pitch_motif, duration_motif
+
+    def extract(self) -> List[Optional[Pitch]]:
+
+        """
+        Get the pitches of a motif array, with `None` for rests.
+        """
+
+        pitches = [None if p == REST else p for p in self.pitches]
+        return pitches
+
+    def replace(self, pitches: List[Optional[Pitch]]) -> 'MotifArray':
+
+        """
+        Get a motif array with the same layout but the given pitches.
+        """
+
+        pitches = array('h', [REST if p is None else p for p in pitches])
+        motif = MotifArray(pitches, self.offsets, self.chords, self.durations)
+        return motif
+
+    def __len__(self) -> int:
+        return len(self.chords)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MotifArray):
+            return NotImplemented
+        return self.to_lines() == other.to_lines()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return 'MotifArray.from_lines({}, {})'.format(*self.to_lines())
+
+
+
+
+# immutable motifs ---------------------------------------------
+
+class PitchMotif(tuple):
+
+    """
+    An immutable, hashable pitch motif, with chords as tuples.
+
+    Functions that take a pitch motif also take a `PitchMotif`
+    and return `PitchMotif`s, which share the chords
+    a transformation leaves unchanged.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, pitch_line: PitchLine = ()) -> 'PitchMotif':
+        if isinstance(pitch_line, PitchMotif):
+            return pitch_line
+
+        return super().__new__(cls, (
+            tuple(item) if isinstance(item, list) else item
+            for item in pitch_line
+        ))
+
+    def to_line(self) -> PitchLine:
+
+        """
+        Convert a `PitchMotif` to a pitch line.
+        """
+
+        return [
+            list(item) if isinstance(item, tuple) else item
+            for item in self
+        ]
+
+    def replace(self, pitches: List[Optional[Pitch]]) -> 'PitchMotif':
+
+        """
+        Get a `PitchMotif` with the same chords but the given pitches.
+        """
+
+        items = []
+        changed = False
+        k = 0
+
+        for item in self:
+            if isinstance(item, tuple):
+                l = len(item)
+                new = tuple(pitches[k:k+l])
+                k = k + l
+
+                # share unchanged chords
+                if new == item:
+                    new = item
+            else:
+                new = pitches[k]
+                k = k + 1
+
+            changed = changed or (new is not item)
+            items.append(new)
+
+        if not changed:
+            return self
+
+        return tuple.__new__(PitchMotif, items)
+
+    def __repr__(self) -> str:
+        return 'PitchMotif({})'.format(self.to_line())
+
+
+class DurationMotif(tuple):
+
+    """
+    An immutable, hashable duration motif.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, duration_line: DurationLine = ()) -> 'DurationMotif':
+        if isinstance(duration_line, DurationMotif):
+            return duration_line
+
+        return super().__new__(cls, duration_line)
+
+    def to_line(self) -> DurationLine:
+
+        """
+        Convert a `DurationMotif` to a duration line.
+        """
+
+        return list(self)
+
+    def __repr__(self) -> str:
+        return 'DurationMotif({})'.format(self.to_line())
+
+
+def _as_line(pitch_motif: PitchLine) -> PitchLine:
+
+    """
+    Get a pitch motif of any representation as a pitch line.
+    """
+
+    if isinstance(pitch_motif, MotifArray):
+        pitch_motif, _ = pitch_motif.to_lines()
+    elif isinstance(pitch_motif, PitchMotif):
+        pitch_motif = pitch_motif.to_line()
+
+    return pitch_motif
+
+
+def _on_lines(function):
+
+    """
+    Let a function of a pitch motif and a duration motif
+    take a motif array in place of both,
+    or a `PitchMotif` and a `DurationMotif`,
+    and return the same types in place of pairs of motifs.
+    """
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if args and isinstance(args[0], MotifArray):
+            lines = args[0].to_lines()
+            args = args[1:]
+
+            def convert(pitch_motif, duration_motif):
+                return MotifArray.from_lines(pitch_motif, duration_motif)
+
+        elif args and isinstance(args[0], PitchMotif):
+            lines = args[0].to_line(), list(args[1])
+            args = args[2:]
+
+            def convert(pitch_motif, duration_motif):
+                return PitchMotif(pitch_motif), DurationMotif(duration_motif)
+
+        else:
+            return function(*args, **kwargs)
+
+        motifs = function(*lines, *args, **kwargs)
+
+        if isinstance(motifs, tuple):
+            return convert(*motifs)
+        else:
+            return [convert(*motif) for motif in motifs]
+
+    return wrapper
+
+
+
+# index durations ----------------------------------------------
+
+_TOLERANCE = 1e-9
+# the difference below which two times are taken as equal
+
+class DurationIndex:
+
+    """
+    The onsets of the notes of a duration line,
+    as cumulative sums, for looking notes up by time.
+
+    Lookups by time bisect the onsets,
+    so they assume the durations are not negative.
+    """
+
+    __slots__ = ('onsets',)
+
+    def __init__(self, duration_line: DurationLine) -> None:
+        self.onsets = list(accumulate(duration_line, initial=0))
+
+    def __len__(self) -> int:
+        return len(self.onsets) - 1
+
+    @property
+    def total(self) -> Duration:
+        return self.onsets[-1]
+
+    def span(self, start: int, end: int) -> Duration:
+
+        """
+        Get the total duration of notes `start` to `end`, inclusive.
+        """
+
+        return self.onsets[end+1] - self.onsets[start]
+
+    def at(self, time: Duration) -> Optional[int]:
+
+        """
+        Get the note that sounds at the given time.
+        """
+
+        if not 0 <= time < self.total:
+            return None
+
+        i = bisect_right(self.onsets, time) - 1
+        return i
+
+    def within(self, start: Duration, end: Duration) -> range:
+
+        """
+        Get the notes that start in the given time range,
+        including `start` but not `end`.
+        """
+
+        n = len(self)
+        i = bisect_left(self.onsets, start, hi=n)
+        j = bisect_left(self.onsets, end, hi=n)
+        return range(i, j)
+
+    def split(self, boundaries: List[Duration]) -> List[List[int]]:
+
+        """
+        Split the notes at the given times.
+
+        Each note falls in the part where it starts,
+        and a part ends once a note reaches its boundary,
+        so a note that covers several boundaries leaves empty parts.
+        A note that ends within `_TOLERANCE` of a boundary reaches it,
+        since float durations such as thirds do not add up exactly.
+        """
+
+        parts = [[]]
+        k = 0
+        m = len(boundaries)
+
+        for i in range(len(self)):
+            parts[-1].append(i)
+            offset = self.onsets[i+1] + _TOLERANCE
+
+            while (k < m) and (boundaries[k] <= offset):
+                parts.append([])
+                k = k + 1
+
+        return parts
+
+
+
 # move single pitches ------------------------------------------
 
-def _reify(scale: List[PitchClass]) -> List[Pitch]:
+class Scale:
 
     """
-    Turn a scale into its whole range of pitches.
+    A scale reified into its whole range of pitches,
+    with the degree of each pitch indexed.
+
+    Scales are built once per set of pitch classes,
+    so constructing the same scale again is a dictionary lookup.
     """
 
-    scale.sort()
+    __slots__ = ('pitch_classes', 'pitches', '_degrees', '_array')
 
-    pitches = [
-        pitch_class + octave*12
-        for octave in range(11)
-        for pitch_class in scale
-    ]
+    # reified scales by pitch classes
+    _scales = {}
 
-    return pitches
+    def __new__(cls, pitch_classes: List[PitchClass]) -> 'Scale':
+        key = tuple(sorted(set(pitch_classes)))
+        scale = cls._scales.get(key)
+
+        if scale is None:
+            scale = object.__new__(cls)
+            scale.pitch_classes = key
+            scale.pitches = tuple(
+                pitch_class + octave*12
+                for octave in range(11)
+                for pitch_class in key
+            )
+            scale._degrees = {
+                pitch: i for i, pitch in enumerate(scale.pitches)
+            }
+            scale._array = None
+            cls._scales[key] = scale
+
+        return scale
+
+    def __reduce__(self):
+        return Scale, (self.pitch_classes,)
+
+    def __repr__(self) -> str:
+        return 'Scale({})'.format(list(self.pitch_classes))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Scale):
+            return NotImplemented
+        return self.pitch_classes == other.pitch_classes
+
+    def __hash__(self) -> int:
+        return hash(self.pitch_classes)
+
+    def __len__(self) -> int:
+        return len(self.pitches)
+
+    def __iter__(self):
+        return iter(self.pitches)
+
+    def __getitem__(self, i):
+        return self.pitches[i]
+
+    def __contains__(self, pitch) -> bool:
+        return pitch in self._degrees
+
+    def index(self, pitch: Pitch) -> int:
+
+        """
+        Get the degree of a pitch on the scale.
+        """
+
+        try:
+            return self._degrees[pitch]
+        except KeyError:
+            raise ValueError('Pitch is not on the scale')
+
+    def to_array(self) -> 'numpy.ndarray':
+
+        """
+        Get the pitches as a NumPy array, built once per scale.
+        """
+
+        if self._array is None:
+            # numpy comes with music21 and is only needed for batches
+            import numpy
+            self._array = numpy.asarray(self.pitches, dtype=numpy.int64)
+
+        return self._array
+
+    def locate(self, pitch: Pitch) -> Tuple[int, bool]:
+
+        """
+        Get the degree of a pitch on the scale,
+        or the degree it would take if inserted into the scale,
+        and whether it is on the scale.
+        """
+
+        i = self._degrees.get(pitch)
+
+        if i is None:
+            return bisect_left(self.pitches, pitch), False
+        else:
+            return i, True
+
+    def move(self, pitch: Pitch, step: int) -> Pitch:
+
+        """
+        Move a pitch along the scale by a certain number of steps.
+        A pitch off the scale is moved as if it were inserted into it.
+        """
+
+        i, on = self.locate(pitch)
+
+        # `pitch` would be at `i` on the extended scale,
+        # which pushes the pitches above it one step up
+        if (not on) and (step > 0):
+            i = i - 1
+
+        return self.pitches[i + step]
+
+
+def _reify(scale: List[PitchClass]) -> Scale:
+
+    """
+    Turn a scale into its whole range of pitches.
+    """
+
+    return Scale(scale)
 
 
 def _move(
         pitch: Optional[Pitch],
-        scale: List[Pitch], # reified
+        scale: Scale, # reified
         step: Optional[int], # for `elaborate`
         error: bool = False
     ) -> Optional[Pitch]:
@@ -53,29 +541,19 @@ def _move(
     if (pitch is None) or (step is None):
         return None
 
-    if pitch not in scale:
-        if step == 0:
-            if error:
-                raise Exception('Pitch is not on the scale')
-            else:
-                return None
+    if (step == 0) and (pitch not in scale):
+        if error:
+            raise Exception('Pitch is not on the scale')
         else:
-            # insert `pitch` into `scale`
-            # do not use `.append()`
-            scale = scale + [pitch] 
-            scale.sort()
-
-    i = scale.index(pitch)
-
-    # move `pitch`
-    pitch = scale[i + step]
+            return None
 
+    pitch = scale.move(pitch, step)
     return pitch
 
 
 def _move2(
         pitch: Optional[Pitch],
-        scale: List[Pitch], # reified
+        scale: Scale, # reified
         steps: List[Optional[int]]
     ) -> List[Optional[Pitch]]:
 
@@ -107,10 +585,13 @@ def _extract(pitch_motif: PitchLine) -> List[Optional[Pitch]]:
     Extract pitches from a pitch motif.
     """
 
+    if isinstance(pitch_motif, MotifArray):
+        return pitch_motif.extract()
+
     pitches = []
 
     for item in pitch_motif:
-        if isinstance(item, list):
+        if isinstance(item, (list, tuple)):
             pitches.extend(item)
         else:
             pitches.append(item)
@@ -128,23 +609,122 @@ def _replace(
     Replace the pitches of a motif.
     """
 
-    if not in_place:
-        pitch_motif = deepcopy(pitch_motif)
+    if isinstance(pitch_motif, (MotifArray, PitchMotif)):
+        return pitch_motif.replace(pitches)
 
+    items = []
     k = 0
 
-    for i, item in enumerate(pitch_motif):
-        if isinstance(item, list):
+    for item in pitch_motif:
+        if isinstance(item, (list, tuple)):
             l = len(item)
-            pitch_motif[i] = pitches[k:k+l]
+            items.append(pitches[k:k+l])
             k = k + l
         else:
-            pitch_motif[i] = pitches[k]
+            items.append(pitches[k])
             k = k + 1
 
-    if not in_place:
-        return pitch_motif
+    if in_place:
+        pitch_motif[:] = items
+    else:
+        return items
+
+
+
+# cache transpositions -----------------------------------------
+
+class _LRU:
+
+    """
+    A size-bounded cache that evicts the least recently used item.
+    A lock makes each lookup and insertion atomic across threads.
+    """
+
+    __slots__ = ('maxsize', 'items', 'hits', 'misses', 'evictions', 'lock')
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def get(self, key: Any) -> Any:
+        with self.lock:
+            value = self.items.get(key)
+
+            if value is None:
+                self.misses = self.misses + 1
+            else:
+                self.hits = self.hits + 1
+                self.items.move_to_end(key)
+
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        with self.lock:
+            self.items[key] = value
+
+            if len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+                self.evictions = self.evictions + 1
+
+
+_cache = None
+# the cache of `_transpose`, see `enable_cache`
+
+
+def enable_cache(maxsize: int = 4096) -> None:
+
+    """
+    Cache the transpositions of segments in
+    `transpose`, `stretch` and `thread`,
+    keeping up to `maxsize` of the most recently used ones.
+    """
+
+    global _cache
+    _cache = _LRU(maxsize)
+
+
+def disable_cache() -> None:
+
+    """
+    Stop caching transpositions and drop the cache.
+    """
+
+    global _cache
+    _cache = None
+
+
+def clear_cache() -> None:
+
+    """
+    Empty the cache of transpositions and reset its statistics.
+    """
 
+    if _cache is not None:
+        enable_cache(_cache.maxsize)
+
+
+def cache_info() -> Dict[str, int]:
+
+    """
+    Get the statistics of the cache of transpositions.
+    """
+
+    if _cache is None:
+        return {}
+
+    info = {
+        'hits': _cache.hits,
+        'misses': _cache.misses,
+        'evictions': _cache.evictions,
+        'size': len(_cache.items),
+        'maxsize': _cache.maxsize
+    }
+
+    return info
 
 
 # repeat pitch motifs ------------------------------------------
@@ -189,16 +769,16 @@ def rescale(
     return motif
 
 
-def _transpose(
+def _shift(
         pitch_motif: PitchLine,
-        scale: List[Pitch], # reified
+        scale: Scale, # reified
         step: int,
         error: bool = True
     ) -> PitchLine:
 
     """
     Transpose a pitch motif along a given scale
-    by a certain number of steps.
+    by a certain number of steps, without the cache.
     """
 
     try:
@@ -218,6 +798,34 @@ def _transpose(
     return motif
 
 
+@timed
+def _transpose(
+        pitch_motif: PitchLine,
+        scale: Scale, # reified
+        step: int,
+        error: bool = True
+    ) -> PitchLine:
+
+    """
+    Transpose a pitch motif along a given scale
+    by a certain number of steps.
+    """
+
+    if (_cache is None) or not isinstance(pitch_motif, list):
+        return _shift(pitch_motif, scale, step, error)
+
+    key = (PitchMotif(pitch_motif), scale, step, error)
+    motif = _cache.get(key)
+
+    if motif is None:
+        motif = _shift(pitch_motif, scale, step, error)
+        _cache.put(key, PitchMotif(motif))
+    else:
+        motif = motif.to_line()
+
+    return motif
+
+
 def transpose(
         pitch_motif: PitchLine,
         scale: List[PitchClass],
@@ -234,153 +842,517 @@ def transpose(
     return motif
 
 
+def transpose_many(
+        pitch_motifs: Iterable[PitchLine],
+        scale: List[PitchClass],
+        steps: List[int],
+        error: bool = False
+    ) -> List[List[PitchLine]]:
+
+    """
+    Transpose each pitch motif along a given scale
+    by each number of steps.
+
+    The result for motif `i` and step `j` is at `[i][j]`,
+    and equals `transpose(pitch_motifs[i], scale, steps[j])`,
+    or `_transpose(pitch_motifs[i], reified, steps[j])` if `error`.
+
+    The pitches of all motifs are located on the scale at once,
+    and moved by all steps with one lookup in an array.
+    """
+
+    import numpy
+
+    scale = _reify(scale)
+    scale_pitches = scale.to_array()
+    n = len(scale_pitches)
+
+    pitch_motifs = list(pitch_motifs)
+    lines = [_extract(pitch_motif) for pitch_motif in pitch_motifs]
+    bounds = [0, *accumulate(len(line) for line in lines)]
+    flat = [pitch for line in lines for pitch in line]
+
+    rests = numpy.array([pitch is None for pitch in flat], dtype=bool)
+    pitches = numpy.array(
+        [0 if pitch is None else pitch for pitch in flat],
+        dtype=numpy.int64
+    )
+    steps = numpy.asarray(steps, dtype=numpy.int64)
+
+    # locate all pitches at once, see `Scale.move`
+    degrees = numpy.searchsorted(scale_pitches, pitches)
+    on = numpy.isin(pitches, scale_pitches)
+
+    # the index of each pitch moved by each step,
+    # with a row for each step
+    indices = degrees + steps[:, None] - (~on & (steps[:, None] > 0))
+
+    # indices past either end fail, as indexing the tuple does
+    valid = (indices >= -n) & (indices < n)
+    indices = numpy.where(indices < 0, indices + n, indices)
+    indices = numpy.where(valid, indices, n)
+
+    # a pitch off the scale can not stay at step 0
+    unplaced = ~on & (steps[:, None] == 0)
+
+    failed = ~valid & ~rests & ~unplaced
+
+    if error:
+        failed = failed | (unplaced & ~rests)
+
+    # the last entry stands for invalid indices
+    table = numpy.append(scale_pitches, 0)
+    values = table[indices].tolist()
+
+    for j, k in zip(*numpy.nonzero(rests | unplaced)):
+        values[j][k] = None
+
+    # whether each motif fails at each step
+    counts = numpy.zeros((len(steps), len(flat) + 1), dtype=numpy.int64)
+    numpy.cumsum(failed, axis=1, out=counts[:, 1:])
+    starts = numpy.array(bounds[:-1], dtype=numpy.int64)
+    ends = numpy.array(bounds[1:], dtype=numpy.int64)
+    failing = (counts[:, ends] > counts[:, starts]).T.tolist()
+
+    groups = []
+
+    for m, pitch_motif in enumerate(pitch_motifs):
+        start, end = bounds[m], bounds[m+1]
+
+        # the pitches of a line without chords are the line
+        plain = isinstance(pitch_motif, list) and not any(
+            isinstance(item, (list, tuple)) for item in pitch_motif
+        )
+
+        motifs = []
+
+        for j in range(len(steps)):
+            if failing[m][j]:
+                motifs.append([])
+                continue
+
+            moved = values[j][start:end]
+
+            if not plain:
+                moved = _replace(pitch_motif, moved)
+
+            motifs.append(moved)
+
+        groups.append(motifs)
+
+    return groups
+
+
+@timed
+def _get_nearest_pitches(
+        pitch_motif: PitchLine,
+        harmony: List[PitchClass],
+        steps: List[int]
+    ) -> List[List[Optional[Pitch]]]:
+
+    """
+    Get each pitch's nearest pitches in a given harmony.
+    """
+
+    pitches = _extract(pitch_motif)
+    scale = _reify(harmony)
+
+    nearest_pitches = [
+        _move2(pitch, scale, steps)
+        for pitch in pitches
+    ]
+
+    return nearest_pitches
+
+
+def ilead(
+        pitch_motif: PitchLine,
+        harmony: List[PitchClass],
+        steps: List[int] = [-1, 0, 1],
+        complete: bool = True,
+        similar: Optional[str] = 'direction',
+        stop: Optional[Event] = None
+    ) -> Iterator[PitchLine]:
+
+    """
+    Repeat a pitch motif in a given harmony,
+    according to the common tone rule and nearest chordal tone rule,
+    yielding the motifs one by one in the order `lead` returns them.
+
+    Once `stop` is set, the search ends,
+    even between motifs, and no more motifs are yielded.
+    """
+
+    nearest_pitches = _get_nearest_pitches(pitch_motif, harmony, steps)
+
+    # combine pitches
+    pitch_groups = _search(
+        pitch_motif, nearest_pitches, harmony, complete, similar,
+        stop=stop
+    )
+
+    recorder = instrument._recorder
+
+    if recorder is None:
+        for pitch_group in pitch_groups:
+            motif = _replace(pitch_motif, pitch_group)
+            yield motif
+
+        return
+
+    # time replacing apart from searching
+    for pitch_group in pitch_groups:
+        start = perf_counter()
+        motif = _replace(pitch_motif, pitch_group)
+        recorder.add('motif._replace', perf_counter() - start)
+        yield motif
+
+
+@timed
 def lead(
         pitch_motif: PitchLine,
         harmony: List[PitchClass],
         steps: List[int] = [-1, 0, 1],
         complete: bool = True,
-        similar: Optional[str] = 'direction'
+        similar: Optional[str] = 'direction',
+        workers: Optional[int] = None,
+        chunksize: Optional[int] = None,
+        top_k: Optional[int] = None,
+        cost: Optional[Callable[[Pitch, Pitch], float]] = None
     ) -> List[PitchLine]:
     
     """
     Repeat a pitch motif in a given harmony,
     according to the common tone rule and nearest chordal tone rule.
+
+    Parameters
+    ----------
+    workers: int, optional
+        The number of processes to search with.
+        The motifs are returned in the same order as without.
+    chunksize: int, optional
+        The number of leading combinations each process takes at once.
+    top_k: int, optional
+        The number of the cheapest motifs to return,
+        in the order of their costs, then in the usual order.
+        The rest are pruned without being generated.
+        The search runs in one process,
+        so it can not be given with `workers` or `chunksize`.
+    cost: callable, optional
+        The cost of moving a pitch to a new pitch,
+        summed over the pitches of a motif, rests costing nothing,
+        the number of semitones moved by default.
+        If given without `top_k`, all motifs are returned by cost.
+        Like `top_k`, it can not be given with `workers` or `chunksize`.
     """
-    
-    pitches = _extract(pitch_motif)
-    scale = _reify(harmony)
 
-    # get each pitch's nearest pitches
-    nearest_pitches = [
-        _move2(pitch, scale, steps)
-        for pitch in pitches
-    ]
+    ranked = (top_k is not None) or (cost is not None)
+
+    if ranked and ((workers is not None) or (chunksize is not None)):
+        raise ValueError(
+            'top_k and cost can not be given with workers or chunksize'
+        )
+
+    nearest_pitches = _get_nearest_pitches(pitch_motif, harmony, steps)
+
+    if ranked:
+        pitch_groups = _best(
+            pitch_motif, nearest_pitches, harmony, complete, similar,
+            top_k, cost or _get_distance
+        )
+
+        motifs = [
+            _replace(pitch_motif, pitch_group)
+            for pitch_group in pitch_groups
+        ]
+
+        return motifs
+
+    if not _is_parallel(nearest_pitches, workers):
+        motifs = list(ilead(pitch_motif, harmony, steps, complete, similar))
+        return motifs
+
+    parts = _run(
+        _lead_part,
+        (pitch_motif, nearest_pitches, harmony, complete, similar),
+        nearest_pitches,
+        workers,
+        chunksize
+    )
+
+    motifs = list(chain(*parts))
+    return motifs
+
+
+def stretch(
+        pitch_motif: PitchLine,
+        start: int,
+        end: int,
+        scale: List[PitchClass],
+        step: int
+    ) -> PitchLine:
+
+    """
+    Move certain part of a pitch motif.
+    """
+
+    is_motif = isinstance(pitch_motif, PitchMotif)
+    pitch_motif = _as_line(pitch_motif)
+
+    part = pitch_motif[start:end+1]
+    part = transpose(part, scale, step)
+    pitch_motif = pitch_motif[:start] + part + pitch_motif[end+1:]
+
+    if is_motif:
+        pitch_motif = PitchMotif(pitch_motif)
+
+    return pitch_motif
+
+
+
+# repeat pitch motifs in harmonies -----------------------------
+
+def _thread_groups(
+        pitch_motif: PitchLine,
+        duration_motif: DurationLine,
+        harmonies: List[List[PitchClass]],
+        durations: DurationLine,
+        steps: List[int]
+    ) -> List[List[PitchLine]]:
+
+    """
+    Get the variants of each segment of a pitch motif
+    in the harmony it falls in.
+    """
+
+    segments = _segment(pitch_motif, duration_motif, durations)
+    groups = []
+
+    for i, segment in enumerate(segments):
+        if not segment:
+            continue
+
+        harmony = _reify(harmonies[i])
+
+        variants = [
+            _transpose(segment, harmony, step)
+            for step in steps
+        ]
+
+        variants = [variant for variant in variants if variant]
+        groups.append(variants)
+
+    return groups
+
+
+def ithread(
+        pitch_motif: PitchLine,
+        duration_motif: DurationLine,
+        harmonies: List[List[PitchClass]],
+        durations: DurationLine,
+        steps: List[int],
+    ) -> Iterator[PitchLine]:
+
+    """
+    Repeat a pitch motif in consecutive harmonies,
+    yielding the motifs one by one in the order `thread` returns them.
+    """
+
+    groups = _thread_groups(
+        pitch_motif, duration_motif, harmonies, durations, steps
+    )
+
+    for variants in product(*groups):
+        motif = list(chain(*variants))
+        yield motif
+
+
+@timed
+def thread(
+        pitch_motif: PitchLine,
+        duration_motif: DurationLine,
+        harmonies: List[List[PitchClass]],
+        durations: DurationLine,
+        steps: List[int],
+        workers: Optional[int] = None,
+        chunksize: Optional[int] = None
+    ) -> List[PitchLine]:
+
+    """
+    Repeat a pitch motif in consecutive harmonies.
+
+    See `lead` for `workers` and `chunksize`.
+    """
+
+    groups = _thread_groups(
+        pitch_motif, duration_motif, harmonies, durations, steps
+    )
+
+    if not _is_parallel(groups, workers):
+        motifs = [
+            list(chain(*variants))
+            for variants in product(*groups)
+        ]
+
+        return motifs
+
+    parts = _run(_thread_part, (groups,), groups, workers, chunksize)
+    motifs = list(chain(*parts))
+    return motifs
+
+
+@timed
+def _segment(
+        pitch_motif: PitchLine,
+        duration_motif: DurationLine,
+        durations: DurationLine
+    ) -> List[PitchLine]:
 
-    # combine pitches
-    pitch_groups = product(*nearest_pitches)
+    """
+    Segment a pitch motif according to the given durations.
+    """
 
-    if complete:
-        pitch_groups = [
-            pitch_group for pitch_group in pitch_groups
-            if _is_complete(pitch_group, harmony)
-        ]
+    boundaries = DurationIndex(durations).onsets[1:]
+    parts = DurationIndex(duration_motif).split(boundaries)
 
-    # generate motifs
     motifs = [
-        # note that `pitch_group` is tuple
-        _replace(pitch_motif, list(pitch_group))
-        for pitch_group in pitch_groups
+        [pitch_motif[i] for i in part]
+        for part in parts
     ]
 
-    if similar:
-        motifs = [
-            motif for motif in motifs
-            if is_similar(motif, pitch_motif, similar)
-        ]
-
     return motifs
 
 
-def stretch(
-        pitch_motif: PitchLine,
-        start: int,
-        end: int,
-        scale: List[PitchClass],
-        step: int
-    ) -> PitchLine:
+
+# run in parallel ----------------------------------------------
+
+_SERIAL_SIZE = 1 << 14
+# spaces of fewer combinations are always searched serially,
+# as starting processes would cost more
+
+
+def _is_parallel(factors: List[list], workers: Optional[int]) -> bool:
 
     """
-    Move certain part of a pitch motif.
+    Check if the combinations of the given factors
+    should be searched in parallel.
     """
 
-    part = pitch_motif[start:end+1]
-    part = transpose(part, scale, step)
-    pitch_motif = pitch_motif[:start] + part + pitch_motif[end+1:]
-    return pitch_motif
+    if (workers is None) or (workers <= 1):
+        return False
 
+    size = 1
 
+    for factor in factors:
+        size = size * len(factor)
 
-# repeat pitch motifs in harmonies -----------------------------
+    return size >= _SERIAL_SIZE
 
-def thread(
+
+def _fix(factors: List[list], d: int, i: int) -> List[list]:
+
+    """
+    Fix the first `d` factors to the `i`th combination of them.
+    """
+
+    digits = _unrank(i, [len(factor) for factor in factors[:d]])
+
+    factors = [
+        [factor[digit]]
+        for factor, digit in zip(factors, digits)
+    ] + factors[d:]
+
+    return factors
+
+
+def _lead_part(
         pitch_motif: PitchLine,
-        duration_motif: DurationLine,
-        harmonies: List[List[PitchClass]],
-        durations: DurationLine,
-        steps: List[int],
+        nearest_pitches: List[List[Optional[Pitch]]],
+        harmony: List[PitchClass],
+        complete: bool,
+        similar: Optional[str],
+        d: int,
+        start: int,
+        end: int
     ) -> List[PitchLine]:
 
     """
-    Repeat a pitch motif in consecutive harmonies.
+    Run `lead` over a range of combinations of the first `d` pitches.
     """
 
-    segments = _segment(pitch_motif, duration_motif, durations)
-    groups = []
+    motifs = []
 
-    for i, segment in enumerate(segments):
-        if not segment:
-            continue
+    for i in range(start, end):
+        pitch_groups = _search(
+            pitch_motif,
+            _fix(nearest_pitches, d, i),
+            harmony,
+            complete,
+            similar
+        )
 
-        harmony = _reify(harmonies[i])
+        for pitch_group in pitch_groups:
+            motifs.append(_replace(pitch_motif, pitch_group))
 
-        variants = [
-            _transpose(segment, harmony, step)
-            for step in steps
-        ]
+    return motifs
 
-        variants = [variant for variant in variants if variant]
-        groups.append(variants)
+
+def _thread_part(
+        groups: List[List[PitchLine]],
+        d: int,
+        start: int,
+        end: int
+    ) -> List[PitchLine]:
+
+    """
+    Run `thread` over a range of combinations of the first `d` segments.
+    """
 
     motifs = [
         list(chain(*variants))
-        for variants in product(*groups)
+        for i in range(start, end)
+        for variants in product(*_fix(groups, d, i))
     ]
 
     return motifs
 
 
-def _segment(
-        pitch_motif: PitchLine,
-        duration_motif: DurationLine,
-        durations: DurationLine
-    ) -> List[PitchLine]:
+def _run(
+        function: Callable[..., list],
+        args: tuple,
+        factors: List[list],
+        workers: int,
+        chunksize: Optional[int]
+    ) -> List[list]:
 
     """
-    Segment a pitch motif according to the given durations.
+    Split the combinations of the given factors
+    into contiguous ranges and run `function` over them in processes.
+    The results are in the order of the ranges.
     """
 
-    motifs = []
-    motif = []
-
-    j = 0
-    l = len(durations) - 1
-    current = durations[j]
-    accum = 0
+    # fix enough leading factors to keep every process busy
+    d = 0
+    n = 1
 
-    for i, duration in enumerate(duration_motif):
-        motif.append(pitch_motif[i])
-        tmp = accum + duration
+    while (d < len(factors)) and (n < workers * 4):
+        n = n * len(factors[d])
+        d = d + 1
 
-        if tmp < current: 
-            accum = tmp
-        else:
-            while tmp >= current:
-                tmp = tmp - current
-                motifs.append(motif)
-                motif = []
+    if chunksize is None:
+        chunksize = -(-n // (workers * 4))
 
-                if j < l:
-                    j = j + 1
-                    current = durations[j]
-                else:
-                    break
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(
+                function, *args, d, start, min(start + chunksize, n)
+            )
+            for start in range(0, n, chunksize)
+        ]
 
-                if tmp < current:
-                    accum = tmp
-                    break
+        parts = [future.result() for future in futures]
 
-    motifs.append(motif)
-    return motifs
+    return parts
 
 
 
@@ -397,13 +1369,19 @@ def _modify(
     Change the item of a pitch motif at the given position.
     """
 
+    # copy only the lists to change,
+    # sharing the other chords with the given motif
     if not in_place:
-        pitch_motif = deepcopy(pitch_motif)
+        pitch_motif = list(pitch_motif)
 
     if isinstance(position, int):
         pitch_motif[position] = item
     else:
         i, j = position
+
+        if not in_place:
+            pitch_motif[i] = list(pitch_motif[i])
+
         pitch_motif[i][j] = item
 
     if not in_place:
@@ -467,10 +1445,10 @@ def is_complete(
     
     # not include the pitches at positions `exclude`
     if exclude:
-        pitch_motif = deepcopy(pitch_motif)
+        pitch_motif = _as_line(pitch_motif)
 
         for position in exclude:
-            _modify(pitch_motif, position, None, True)
+            pitch_motif = _modify(pitch_motif, position, None)
 
     pitches = _extract(pitch_motif)
     completeness = _is_complete(pitches, harmony)
@@ -480,23 +1458,25 @@ def is_complete(
 
 # check morphological similarity of pitch motifs ---------------
 
-def _get_directions(pitches: List[Pitch]) -> List[int]:
+def _sign(x: int) -> int:
 
     """
-    Get the direction from each pitch to its next.
+    Get the sign of a number.
     """
 
-    directions = []
+    return (x > 0) - (x < 0)
 
-    for i, pitch in enumerate(pitches[:-1]):
-        d = pitches[i+1] - pitch
 
-        if d > 0:
-            directions.append(1)
-        elif d < 0:
-            directions.append(-1)
-        else:
-            directions.append(0)
+def _get_directions(pitches: List[Pitch]) -> List[int]:
+
+    """
+    Get the direction from each pitch to its next.
+    """
+
+    directions = [
+        _sign(pitch - previous)
+        for previous, pitch in zip(pitches, pitches[1:])
+    ]
 
     return directions
 
@@ -507,34 +1487,38 @@ def _get_ordinals(pitches: List[Pitch]) -> List[int]:
     Get the ordinals of the given pitches.
     """
 
-    _ = sorted(set(pitches))
-    ordinals = [_.index(pitch) for pitch in pitches]
+    ranks = {pitch: i for i, pitch in enumerate(sorted(set(pitches)))}
+    ordinals = [ranks[pitch] for pitch in pitches]
     return ordinals
 
 
 def _measure(
         start: Pitch,
         end: Pitch,
-        scale: List[Pitch] # reified
+        scale: Scale # reified
     ) -> int:
 
     """
     Measure the displacement between two pitches on the given scale.
+    Pitches off the scale are counted as if inserted into it.
     """
 
-    for pitch in start, end:
-        if pitch not in scale:
-            scale.append(pitch)
+    i, on_start = scale.locate(start)
+    j, on_end = scale.locate(end)
 
-    scale.sort()
+    # each pitch off the scale pushes the pitches above it one step up
+    if (not on_start) and (start < end):
+        j = j + 1
+    elif (not on_end) and (end < start):
+        i = i + 1
 
-    step = scale.index(end) - scale.index(start)
+    step = j - i
     return step
 
 
 def _get_steps(
         pitches: List[Pitch],
-        scale: List[Pitch] # reified
+        scale: Scale # reified
     ) -> List[int]:
     
     """
@@ -549,6 +1533,46 @@ def _get_steps(
     return steps
 
 
+def _get_tops(pitch_motif: PitchLine) -> List[Pitch]:
+
+    """
+    Get the pitches that shape the contour of a pitch motif.
+    """
+
+    tops = [
+        # keep only the highest pitch in a chord
+        max(item) if isinstance(item, (list, tuple)) else item
+        # remove `None`
+        for item in pitch_motif if item
+    ]
+
+    return tops
+
+
+def _get_contour(
+        pitch_motif: PitchLine,
+        method: str,
+        scale: Scale # reified
+    ) -> List[int]:
+
+    """
+    Get the contour of a pitch motif.
+    """
+
+    pitches = _get_tops(pitch_motif)
+
+    if method == 'direction':
+        contour = _get_directions(pitches)
+    elif method == 'ordinal':
+        contour = _get_ordinals(pitches)
+    elif method == 'step':
+        contour = _get_steps(pitches, scale)
+    else:
+        raise ValueError('Unknown method: {}'.format(method))
+
+    return contour
+
+
 def is_similar(
         pitch_motif: PitchLine,
         proto: PitchLine,
@@ -560,32 +1584,443 @@ def is_similar(
     Check if a pitch motif has a similar contour to the prototype.
     """
 
-    # get the contour of a pitch motif
-    def _get_contour(pitch_motif):
-        
-        # extract pitches
-        pitches = [
-            # keep only the highest pitch in a chord
-            max(item) if isinstance(item, list) else item
-            # remove `None`
-            for item in pitch_motif if item
-        ]
+    scale = _reify(scale)
 
-        # get contour
-        if method == 'direction':
-            contour = _get_directions(pitches)
-        elif method == 'ordinal':
-            contour = _get_ordinals(pitches)
-        elif method == 'step':
-            contour = _get_steps(pitches, scale)
+    similarity = _get_contour(pitch_motif, method, scale) == \
+        _get_contour(proto, method, scale)
 
-        return contour
+    return similarity
 
-    if scale:
-        scale = _reify(scale)
 
-    similarity = _get_contour(pitch_motif) == _get_contour(proto)
-    return similarity
+def is_similar_many(
+        pitch_motifs: Union[Iterable[PitchLine], 'numpy.ndarray'],
+        proto: PitchLine,
+        method: str = 'direction', # 'ordinal', 'step'
+        scale: List[PitchClass] = []
+    ) -> List[bool]:
+
+    """
+    Check if each pitch motif has a similar contour to the prototype,
+    with the prototype's contour computed only once.
+
+    Motifs with as many contour pitches as the prototype
+    are compared together as rows of an array,
+    and the others can not be similar.
+
+    Getting the contour pitches of each motif is done in Python,
+    and takes most of the time for many motifs.
+    To compare the same motifs with several prototypes,
+    `pitch_motifs` can instead be a 2-D array
+    with the contour pitches of a motif in each row,
+    as `_get_tops` gives them, which is used as it is.
+    """
+
+    # numpy comes with music21 and is only needed here
+    import numpy
+
+    if method not in ('direction', 'ordinal', 'step'):
+        raise ValueError('Unknown method: {}'.format(method))
+
+    scale = _reify(scale)
+    proto = _get_tops(proto)
+    n = len(proto)
+
+    if isinstance(pitch_motifs, numpy.ndarray):
+        if pitch_motifs.ndim != 2:
+            raise ValueError('Contour pitches must be a 2-D array.')
+
+        tops = pitch_motifs
+        sizes = [tops.shape[1]] * len(tops)
+    else:
+        tops = [_get_tops(pitch_motif) for pitch_motif in pitch_motifs]
+        sizes = [len(pitches) for pitches in tops]
+
+    # contours between pitches are empty for up to one pitch
+    if (method != 'ordinal') and (n <= 1):
+        return [size <= 1 for size in sizes]
+
+    similarities = numpy.zeros(len(tops), dtype=bool)
+
+    if isinstance(tops, numpy.ndarray):
+        rows = slice(None) if tops.shape[1] == n else []
+        pitches = tops[rows].astype(numpy.int64)
+    else:
+        rows = [i for i, size in enumerate(sizes) if size == n]
+        pitches = numpy.array([tops[i] for i in rows], dtype=numpy.int64)
+        pitches = pitches.reshape(len(rows), n)
+
+    if not len(pitches):
+        return similarities.tolist()
+
+    if method == 'step':
+        contour = _get_steps(proto, scale)
+
+        # see `_measure`
+        scale_pitches = scale.to_array()
+        degrees = numpy.searchsorted(scale_pitches, pitches)
+        on = numpy.isin(pitches, scale_pitches)
+
+        start, end = pitches[:, :-1], pitches[:, 1:]
+        on_start, on_end = on[:, :-1], on[:, 1:]
+
+        contours = degrees[:, 1:] - degrees[:, :-1] + \
+            (~on_start & (start < end)) - (~on_end & (end < start))
+    else:
+        proto = numpy.array(proto, dtype=numpy.int64)
+
+        # motifs have the prototype's ordinals
+        # if they go the same way along the prototype's order
+        if method == 'ordinal':
+            order = numpy.argsort(proto, kind='stable')
+            proto = proto[order]
+            pitches = pitches[:, order]
+
+        contour = numpy.sign(numpy.diff(proto))
+        contours = numpy.sign(numpy.diff(pitches, axis=1))
+
+    similarities[rows] = (contours == contour).all(axis=1)
+    return similarities.tolist()
+
+
+
+# search combinations of pitches -------------------------------
+
+def _unrank(i: int, radices: List[int]) -> List[int]:
+
+    """
+    Get the index into each factor of the `i`th combination
+    of `product` over factors of the given sizes.
+    """
+
+    digits = []
+
+    for radix in reversed(radices):
+        i, digit = divmod(i, radix)
+        digits.append(digit)
+
+    digits.reverse()
+    return digits
+
+
+def _search(
+        pitch_motif: PitchLine,
+        options: List[List[Optional[Pitch]]],
+        harmony: List[PitchClass],
+        complete: bool,
+        similar: Optional[str],
+        costs: Optional[List[List[float]]] = None,
+        limit: Optional[List[float]] = None,
+        stop: Optional[Event] = None
+    ) -> Iterator[List[Optional[Pitch]]]:
+
+    """
+    Combine the options for each pitch of a pitch motif,
+    yielding the combinations that pass `_is_complete` and `is_similar`
+    in the order of `product(*options)`.
+
+    Pitches are assigned one by one,
+    and a partial combination is dropped as soon as
+    its contour diverges from the motif's,
+    or the remaining options can not complete the harmony.
+
+    If `costs` of the options are given,
+    a partial combination is also dropped as soon as
+    its cost plus the least cost of the remaining positions
+    exceeds `limit[0]`, which the caller can lower during the search.
+
+    The search ends at the next partial combination once `stop` is set.
+    """
+
+    pitch_motif = _as_line(pitch_motif)
+    n = len(options)
+
+    # the item each position closes, if any,
+    # with the item's first position and whether it is a chord
+    closes = [None] * n
+    k = 0
+
+    for item in pitch_motif:
+        if isinstance(item, list):
+            if item:
+                closes[k + len(item) - 1] = (k, True)
+                k = k + len(item)
+        else:
+            closes[k] = (k, False)
+            k = k + 1
+
+    # pitch classes still available from each position on
+    if complete:
+        harmony = set(harmony)
+        available = [set()]
+
+        for pitches in reversed(options):
+            pitch_classes = {pitch % 12 for pitch in pitches if pitch}
+            available.append(available[-1] | pitch_classes)
+
+        available.reverse()
+
+        if not harmony <= available[0]:
+            return
+
+        counts = [0] * 12
+
+    # the contour to keep
+    if similar:
+        scale = _reify([])
+        proto = _get_tops(pitch_motif)
+        contour = _get_contour(pitch_motif, similar, scale)
+        tops = []
+
+    def fits(top):
+        k = len(tops)
+
+        # keep the relative order to every previous pitch
+        if similar == 'ordinal':
+            if k >= len(proto):
+                return False
+
+            return all(
+                _sign(top - t) == _sign(proto[k] - proto[j])
+                for j, t in enumerate(tops)
+            )
+
+        if not tops:
+            return True
+
+        if k > len(contour):
+            return False
+
+        if similar == 'direction':
+            d = _sign(top - tops[-1])
+        else:
+            d = _measure(tops[-1], top, scale)
+
+        return d == contour[k-1]
+
+    def is_done():
+        if similar == 'ordinal':
+            return len(tops) == len(proto)
+        else:
+            return max(len(tops) - 1, 0) == len(contour)
+
+    # the least cost from each position on, and the cost so far
+    if costs is not None:
+        least = [0] * (n + 1)
+
+        for m in reversed(range(n)):
+            least[m] = least[m+1] + min(costs[m], default=0)
+
+        spent = [0] * (n + 1)
+
+    values = [None] * n
+
+    # the numbers of partial combinations tried,
+    # and dropped for completeness, similarity and cost
+    tally = [0, 0, 0, 0]
+
+    # the option to try next at each position,
+    # and whether the current one is counted or closes an item
+    nexts = [0] * (n + 1)
+    counted = [False] * n
+    pushed = [False] * n
+
+    def undo(m):
+        if pushed[m]:
+            tops.pop()
+            pushed[m] = False
+
+        if counted[m]:
+            counts[values[m] % 12] = counts[values[m] % 12] - 1
+            counted[m] = False
+
+    def search():
+        m = 0
+
+        if n:
+            tally[0] = tally[0] + len(options[0])
+
+        # assign pitches depth-first with a stack of positions,
+        # so that long motifs do not exceed the recursion limit
+        while m >= 0:
+            if (stop is not None) and stop.is_set():
+                return
+
+            if m == n:
+                if (not similar) or is_done():
+                    yield list(values)
+
+                m = m - 1
+
+                if m >= 0:
+                    undo(m)
+
+                continue
+
+            j = nexts[m]
+
+            if j == len(options[m]):
+                m = m - 1
+
+                if m >= 0:
+                    undo(m)
+
+                continue
+
+            nexts[m] = j + 1
+            pitch = options[m][j]
+
+            if costs is not None:
+                cost = spent[m] + costs[m][j]
+
+                if cost + least[m+1] > limit[0]:
+                    tally[3] = tally[3] + 1
+                    continue
+
+                spent[m+1] = cost
+
+            values[m] = pitch
+
+            if complete and pitch:
+                counts[pitch % 12] = counts[pitch % 12] + 1
+                counted[m] = True
+
+            close = closes[m]
+
+            if complete and not all(
+                    counts[pitch_class] or pitch_class in available[m+1]
+                    for pitch_class in harmony):
+                tally[1] = tally[1] + 1
+                undo(m)
+                continue
+            elif similar and close and (close[1] or pitch):
+                i, is_chord = close
+                top = max(values[i:m+1]) if is_chord else pitch
+
+                if not fits(top):
+                    tally[2] = tally[2] + 1
+                    undo(m)
+                    continue
+
+                tops.append(top)
+                pushed[m] = True
+
+            # go to the next position
+            m = m + 1
+
+            if m < n:
+                nexts[m] = 0
+                tally[0] = tally[0] + len(options[m])
+
+    try:
+        yield from search()
+    finally:
+        recorder = instrument._recorder
+
+        if recorder is not None:
+            recorder.count('motif._search.nodes', tally[0])
+            recorder.count('motif._search.incomplete', tally[1])
+            recorder.count('motif._search.dissimilar', tally[2])
+
+            if costs is not None:
+                recorder.count('motif._search.costly', tally[3])
+
+
+def _get_distance(pitch: Pitch, new: Pitch) -> int:
+
+    """
+    Get the number of semitones a pitch moves.
+    """
+
+    return abs(new - pitch)
+
+
+def _best(
+        pitch_motif: PitchLine,
+        options: List[List[Optional[Pitch]]],
+        harmony: List[PitchClass],
+        complete: bool,
+        similar: Optional[str],
+        k: Optional[int],
+        cost: Callable[[Pitch, Pitch], float]
+    ) -> List[List[Optional[Pitch]]]:
+
+    """
+    Get the `k` cheapest combinations that `_search` yields,
+    in the order of their costs, then of `product(*options)`.
+
+    The distinct options of each pitch are tried from the cheapest,
+    so that cheap combinations are found first,
+    and the limit of `_search` drops to the cost of the `k`th one.
+    A combination of repeated options is counted once per repeat,
+    as `product` does.
+    Rests cost nothing, and `cost` is not called for them.
+    """
+
+    if (k is not None) and (k <= 0):
+        return []
+
+    pitches = _extract(pitch_motif)
+
+    def price(pitch, option):
+        if (pitch is None) or (option is None):
+            return 0
+
+        return cost(pitch, option)
+
+    # the indices of each option in `options`,
+    # so that repeated options are searched once
+    indices = [{} for _ in options]
+
+    for m, pitch_options in enumerate(options):
+        for j, option in enumerate(pitch_options):
+            indices[m].setdefault(option, []).append(j)
+
+    # the options of each pitch from the cheapest
+    options = [
+        sorted(pitch_indices, key=lambda option: price(pitch, option))
+        for pitch, pitch_indices in zip(pitches, indices)
+    ]
+
+    costs = [
+        [price(pitch, option) for option in pitch_options]
+        for pitch, pitch_options in zip(pitches, options)
+    ]
+
+    limit = [float('inf')]
+    best = []
+
+    pitch_groups = _search(
+        pitch_motif, options, harmony, complete, similar, costs, limit
+    )
+
+    for pitch_group in pitch_groups:
+        total = sum(
+            price(pitch, option)
+            for pitch, option in zip(pitches, pitch_group)
+        )
+
+        ranks = product(*(
+            indices[m][option]
+            for m, option in enumerate(pitch_group)
+        ))
+
+        # keep the best `k` sorted, or sort all of them once at the end
+        if k is None:
+            best.extend((total, rank, pitch_group) for rank in ranks)
+            continue
+
+        for rank in ranks:
+            insort(best, (total, rank, pitch_group))
+
+        if len(best) >= k:
+            del best[k:]
+            limit[0] = best[-1][0]
+
+    if k is None:
+        best.sort()
+
+    pitch_groups = [pitch_group for _, _, pitch_group in best]
+    return pitch_groups
 
 
 
@@ -603,6 +2038,8 @@ def _get_i(position: Union[int, Tuple[int, int]]) -> int:
     return position
 
 
+@timed
+@_on_lines
 def elaborate(
         pitch_motif: PitchLine,
         duration_motif: DurationLine,
@@ -699,6 +2136,7 @@ def elaborate(
     return pitch_motif, duration_motif
 
 
+@_on_lines
 def reduce(
         pitch_motif: PitchLine,
         duration_motif: DurationLine,
@@ -713,7 +2151,7 @@ def reduce(
 
     # add the reduced duration to the given position
     duration = sum(duration_motif[start:end+1])
-    duration_motif = deepcopy(duration_motif)
+    duration_motif = list(duration_motif)
     
     if position == 'left':
         duration_motif[start-1] = duration_motif[start-1] + duration
@@ -728,6 +2166,7 @@ def reduce(
 
 # fragment motifs ----------------------------------------------
 
+@_on_lines
 def divide(
         pitch_motif: PitchLine,
         duration_motif: DurationLine,
@@ -744,12 +2183,12 @@ def divide(
     # the duration of each part
     unit = sum(duration_motif) / n
 
-    # working motif
+    # working motif, and its duration so far
     pm = []
     dm = []
+    current = 0
 
     for i, duration in enumerate(duration_motif):
-        current = sum(dm)
         tmp = current + duration
         residual = tmp - unit
 
@@ -758,6 +2197,7 @@ def divide(
 
         if residual <= 0:
             dm.append(duration)
+            current = tmp
         
         else:
             last = unit - current
@@ -774,16 +2214,19 @@ def divide(
                 residual = residual - unit
 
             dm = [residual + unit]
+            current = residual + unit
 
         if residual == 0:
             motif = pm, dm
             motifs.append(motif)
             pm = []
             dm = []
+            current = 0
 
     return motifs
 
 
+@_on_lines
 def fragment(
         pitch_motif: PitchLine,
         duration_motif: DurationLine,
@@ -0,0 +1,393 @@
+"""
+Write music to MusicXML without music21.
+"""
+
+import re
+from io import StringIO
+from math import lcm
+from fractions import Fraction
+from typing import List, Union, Optional, Tuple, TextIO
+from ch0p1n.motif import Pitch, PitchLine, DurationLine
+from ch0p1n.utils import _NOTE_NAMES, _to_notations, to_notation_lines
+from ch0p1n.instrument import timed
+
+Note = Tuple[str, int, str]
+# the step, alteration and octave of a note
+
+Event = Tuple[Union[None, Note, List[Note]], Fraction]
+# a note, chord or rest, and its duration in quarter notes
+
+Piece = Tuple[Union[None, Note, List[Note]], Fraction, bool, bool]
+# part of an event within a measure,
+# and whether it is tied to the previous and the next parts
+
+
+
+# spell pitches ------------------------------------------------
+
+def _spell(pitch: Union[Pitch, str], key: int) -> str:
+
+    """
+    Spell a pitch that is off the key with the fewest accidentals,
+    preferring sharps in sharp keys and flats in flat keys.
+    """
+
+    if isinstance(pitch, str):
+        return pitch
+
+    notations = _to_notations(pitch)
+
+    def rank(notation):
+        _, alter, _ = _parse(notation, pitch)
+        return abs(alter), (alter < 0) != (key < 0)
+
+    notations.sort(key=rank)
+    return notations[0]
+
+
+_NOTATION = re.compile(r'([A-Ga-g])([#-]*?)(-?[0-9]+)')
+# a step, an accidental and an octave, which may be negative
+
+
+def _parse(notation: str, pitch: Union[Pitch, str, None] = None) -> Note:
+
+    """
+    Split a notation into its step, alteration and octave.
+
+    A flat and the sign of a negative octave are both written `-`,
+    so `'B-1'` is taken as B in octave -1,
+    unless it is the spelling of `pitch`, B-flat in octave 1.
+    """
+
+    match = _NOTATION.fullmatch(notation)
+
+    if match is None:
+        raise ValueError('invalid notation: {!r}'.format(notation))
+
+    step, accidental, octave = match.groups()
+    step = step.upper()
+
+    if accidental.startswith('#'):
+        alter = len(accidental)
+    else:
+        alter = -len(accidental)
+
+    if isinstance(pitch, int) and octave.startswith('-') and \
+            _NOTE_NAMES[step] + alter + 12*int(octave[1:]) + 11 == pitch:
+        alter = alter - 1
+        octave = octave[1:]
+
+    return step, alter, octave
+
+
+def _to_events(
+        pitch_line: PitchLine,
+        duration_line: DurationLine,
+        key: int
+    ) -> List[Event]:
+
+    """
+    Pair the spelled notes of a pitch line with their durations.
+    """
+
+    events = []
+    notation_line, = to_notation_lines([pitch_line], key)
+
+    for item, notations, duration in zip(
+            pitch_line, notation_line, duration_line):
+        if isinstance(item, (list, tuple)):
+            item = [
+                _parse(_spell(notation, key), pitch)
+                for pitch, notation in zip(item, notations)
+            ] or None
+        elif item is not None:
+            item = _parse(_spell(notations, key), item)
+
+        duration = abs(duration) # see `elaborate`
+        duration = Fraction(duration).limit_denominator(1 << 12)
+        events.append((item, duration))
+
+    return events
+
+
+
+# split events -------------------------------------------------
+
+_TYPES = {
+    Fraction(8): 'breve',
+    Fraction(4): 'whole',
+    Fraction(2): 'half',
+    Fraction(1): 'quarter',
+    Fraction(1, 2): 'eighth',
+    Fraction(1, 4): '16th',
+    Fraction(1, 8): '32nd',
+    Fraction(1, 16): '64th'
+}
+
+_VALUES = sorted((
+    (length * dotted * tuplet, name, dots, tuplet != 1)
+    for length, name in _TYPES.items()
+    for dots, dotted in enumerate([1, Fraction(3, 2), Fraction(7, 4)])
+    for tuplet in [1, Fraction(2, 3)]
+    if (tuplet == 1) or (dots == 0)
+), reverse=True)
+# the notated values and their types, dots and whether they are triplets
+
+
+def _to_measures(
+        events: List[Event],
+        length: Fraction,
+        n: int
+    ) -> List[List[Piece]]:
+
+    """
+    Split events at barlines into `n` measures, filled up with rests.
+    """
+
+    measures = [[] for _ in range(n)]
+    time = Fraction(0)
+
+    for item, duration in events:
+        tied = False
+
+        while duration > 0:
+            i = int(time // length)
+            piece = min(duration, (i+1)*length - time)
+            duration = duration - piece
+            time = time + piece
+            tie = (item is not None) and (duration > 0)
+            measures[i].append((item, piece, tied, tie))
+            tied = tie
+
+    # fill up the last measures
+    while time < n * length:
+        i = int(time // length)
+        piece = (i+1)*length - time
+        measures[i].append((None, piece, False, False))
+        time = time + piece
+
+    return measures
+
+
+def _to_values(
+        duration: Fraction,
+        divisions: int
+    ) -> List[Optional[Tuple[Fraction, str, int, bool]]]:
+
+    """
+    Split a duration into notated values,
+    or `[None]` if it can not be notated.
+    """
+
+    values = []
+
+    while duration > 0:
+        for value in _VALUES:
+            rest = duration - value[0]
+
+            if (rest >= 0) and (rest * divisions).denominator == 1:
+                values.append(value)
+                duration = rest
+                break
+        else:
+            return [None]
+
+    return values
+
+
+
+# write MusicXML -----------------------------------------------
+
+_HEADER = '''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE score-partwise PUBLIC "-//Recordare//DTD MusicXML 3.1 Partwise//EN" "http://www.musicxml.org/dtds/partwise.dtd">
+<score-partwise version="3.1">
+<part-list><score-part id="P1"><part-name/></score-part></part-list>
+<part id="P1">
+'''
+
+_FOOTER = '''</part>
+</score-partwise>
+'''
+
+_CLEFS = {
+    'g': '<sign>G</sign><line>2</line>',
+    'f': '<sign>F</sign><line>4</line>'
+}
+
+
+def _write_piece(
+        file: TextIO,
+        piece: Piece,
+        voice: int,
+        staff: int,
+        divisions: int
+    ) -> None:
+
+    """
+    Write a piece of an event as tied notes, chords or rests.
+    """
+
+    item, duration, tied, tie = piece
+    values = _to_values(duration, divisions)
+
+    for k, value in enumerate(values):
+        if value is None:
+            length = duration
+        else:
+            length = value[0]
+
+        start = tie or (k < len(values) - 1)
+        stop = tied or (k > 0)
+        ties = ''
+        notations = ''
+
+        if item is not None:
+            if stop:
+                ties = ties + '<tie type="stop"/>'
+                notations = notations + '<tied type="stop"/>'
+            if start:
+                ties = ties + '<tie type="start"/>'
+                notations = notations + '<tied type="start"/>'
+
+        if notations:
+            notations = '<notations>' + notations + '</notations>'
+
+        if value is None:
+            notation = ''
+        else:
+            _, name, dots, triplet = value
+            notation = '<type>' + name + '</type>' + '<dot/>' * dots
+
+            if triplet:
+                notation = notation + '<time-modification>' + \
+                    '<actual-notes>3</actual-notes>' + \
+                    '<normal-notes>2</normal-notes></time-modification>'
+
+        tail = '<duration>{}</duration>{}<voice>{}</voice>{}' \
+            '<staff>{}</staff>{}</note>\n'.format(
+                int(length * divisions), ties, voice, notation,
+                staff, notations
+            )
+
+        if item is None:
+            file.write('<note><rest/>' + tail)
+            continue
+
+        chord = item if isinstance(item, list) else [item]
+
+        for i, (step, alter, octave) in enumerate(chord):
+            file.write(
+                '<note>' + ('<chord/>' if i else '') +
+                '<pitch><step>' + step + '</step>' +
+                ('<alter>{}</alter>'.format(alter) if alter else '') +
+                '<octave>' + octave + '</octave></pitch>' + tail
+            )
+
+
+@timed
+def write_musicxml(
+        file: TextIO,
+        pitch_lines: List[PitchLine],
+        duration_lines: List[DurationLine],
+        group: int = 1,
+        key: int = 0,
+        meter: str = '4/4',
+        clefs: List[str] = ['g', 'f']
+    ) -> None:
+
+    """
+    Write music to a text file as MusicXML,
+    a measure at a time, without music21.
+
+    The parameters other than `file` are those of `utils.show`.
+
+    Examples
+    --------
+    >>> pitch_lines = [[60, [62, 63]], [None, 40]]
+    >>> duration_lines = [[1, 3], [1, 3]]
+    >>> with open('score.musicxml', 'w') as file:
+    ...     write_musicxml(file, pitch_lines, duration_lines)
+    """
+
+    events = [
+        _to_events(pitch_line, duration_line, key)
+        for pitch_line, duration_line in zip(pitch_lines, duration_lines)
+    ]
+
+    # assign lines to staffs,
+    # filling the empty staff with a rest
+    staffs = [1] * group + [2] * (len(events) - group)
+
+    for staff in 1, 2:
+        if staff not in staffs:
+            events.append([(None, Fraction(0))])
+            staffs.append(staff)
+
+    order = sorted(range(len(events)), key=lambda i: staffs[i])
+
+    # the length of measures in quarter notes
+    beats, beat_type = meter.split('/')
+    length = Fraction(4 * int(beats), int(beat_type))
+
+    total = max(sum(duration for _, duration in line) for line in events)
+    n = max(1, -(-total // length))
+
+    divisions = lcm(length.denominator, *(
+        duration.denominator
+        for line in events
+        for _, duration in line
+    ))
+
+    measures = [_to_measures(line, length, n) for line in events]
+
+    file.write(_HEADER)
+
+    for m in range(n):
+        file.write('<measure number="{}">\n'.format(m + 1))
+
+        if m == 0:
+            file.write(
+                '<attributes><divisions>{}</divisions>'
+                '<key><fifths>{}</fifths></key>'
+                '<time><beats>{}</beats><beat-type>{}</beat-type></time>'
+                '<staves>2</staves>'
+                '<clef number="1">{}</clef><clef number="2">{}</clef>'
+                '</attributes>\n'.format(
+                    divisions, key, beats, beat_type,
+                    _CLEFS[clefs[0]], _CLEFS[clefs[1]]
+                )
+            )
+
+        for k, i in enumerate(order):
+            if k > 0:
+                file.write('<backup><duration>{}</duration></backup>\n'
+                    .format(int(length * divisions)))
+
+            for piece in measures[i][m]:
+                _write_piece(file, piece, k + 1, staffs[i], divisions)
+
+        file.write('</measure>\n')
+
+    file.write(_FOOTER)
+
+
+def to_musicxml(
+        pitch_lines: List[PitchLine],
+        duration_lines: List[DurationLine],
+        group: int = 1,
+        key: int = 0,
+        meter: str = '4/4',
+        clefs: List[str] = ['g', 'f']
+    ) -> str:
+
+    """
+    Convert music to a MusicXML string. See `write_musicxml`.
+    """
+
+    file = StringIO()
+
+    write_musicxml(
+        file, pitch_lines, duration_lines, group, key, meter, clefs
+    )
+
+    return file.getvalue()
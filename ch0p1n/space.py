@@ -0,0 +1,264 @@
+"""
+Access and sample the results of `lead` and `thread`
+without enumerating them.
+"""
+
+import sys
+from random import Random
+from itertools import product, chain
+from typing import List, Optional, Callable, Iterator, Any
+from ch0p1n.motif import (
+    PitchClass, PitchLine, DurationLine, _as_line,
+    _reify, _replace, _get_nearest_pitches, _is_complete, _get_contour,
+    _thread_groups, _unrank, ilead
+)
+
+
+
+# spaces of combinations ---------------------------------------
+
+class Space:
+
+    """
+    The combinations of one option from each factor,
+    in the order of `product(*factors)`.
+
+    Parameters
+    ----------
+    factors: list
+        The options for each position.
+    build: callable
+        Turns a combination, a tuple of options, into a result.
+    accept: callable, optional
+        Tells if a combination and the result built from it
+        pass the filters of the generating function.
+    search: callable, optional
+        Iterates over the results that pass the filters, in order,
+        without trying every combination.
+
+    Examples
+    --------
+    >>> space = thread_space([61, 67], [4, 4], [[0, 4, 7]] * 2, [4, 4],
+    ...     [-1, 0, 1])
+    >>> len(space)
+    6
+    >>> space[1]
+    [60, 67]
+    """
+
+    def __init__(
+            self,
+            factors: List[list],
+            build: Callable[[tuple], Any],
+            accept: Optional[Callable[[tuple, Any], bool]] = None,
+            search: Optional[Callable[[], Iterator[Any]]] = None
+        ) -> None:
+
+        self.factors = factors
+        self.build = build
+        self.accept = accept
+        self.search = search
+
+        self.radices = [len(factor) for factor in factors]
+        self.size = 1
+
+        for radix in self.radices:
+            self.size = self.size * radix
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, i: int) -> Any:
+        if i < 0:
+            i = i + self.size
+
+        if not 0 <= i < self.size:
+            raise IndexError('Space index out of range')
+
+        digits = _unrank(i, self.radices)
+
+        combination = tuple(
+            factor[digit]
+            for factor, digit in zip(self.factors, digits)
+        )
+
+        return self.build(combination)
+
+    def __iter__(self) -> Iterator[Any]:
+        for combination in product(*self.factors):
+            yield self.build(combination)
+
+    def _draw(self, rng: Random) -> Iterator[int]:
+
+        """
+        Draw distinct indices uniformly at random
+        until the space is exhausted.
+        """
+
+        # shuffle small spaces
+        if self.size <= 1 << 16:
+            indices = list(range(self.size))
+            rng.shuffle(indices)
+            yield from indices
+            return
+
+        drawn = set()
+
+        while len(drawn) < self.size:
+            i = rng.randrange(self.size)
+
+            if i not in drawn:
+                drawn.add(i)
+                yield i
+
+    def sample(
+            self,
+            k: int,
+            seed: Optional[int] = None,
+            exact: bool = False,
+            tries: int = 10000
+        ) -> List[Any]:
+
+        """
+        Sample `k` results uniformly without replacement.
+
+        With filters, combinations are drawn at random and
+        rejected until `k` pass,
+        or until `tries` combinations have been drawn.
+        If `exact`, all passing results are enumerated and
+        sampled from as they come, keeping only `k` of them,
+        which is slower but never falls short
+        while enough results exist.
+        """
+
+        rng = Random(seed)
+
+        if self.accept is None:
+            if self.size <= sys.maxsize:
+                indices = rng.sample(range(self.size), min(k, self.size))
+            else:
+                indices = [i for i, _ in zip(self._draw(rng), range(k))]
+
+            return [self[i] for i in indices]
+
+        if exact:
+            results = []
+
+            # reservoir sampling
+            for n, result in enumerate(self.filter()):
+                if n < k:
+                    results.append(result)
+                else:
+                    j = rng.randrange(n + 1)
+
+                    if j < k:
+                        results[j] = result
+
+            rng.shuffle(results)
+            return results
+
+        results = []
+
+        for n, i in enumerate(self._draw(rng)):
+            if (len(results) == k) or (n == tries):
+                break
+
+            digits = _unrank(i, self.radices)
+
+            combination = tuple(
+                factor[digit]
+                for factor, digit in zip(self.factors, digits)
+            )
+
+            result = self.build(combination)
+
+            if self.accept(combination, result):
+                results.append(result)
+
+        return results
+
+    def filter(self) -> Iterator[Any]:
+
+        """
+        Iterate over the results that pass the filters.
+        """
+
+        if self.search is not None:
+            yield from self.search()
+            return
+
+        for combination in product(*self.factors):
+            result = self.build(combination)
+
+            if (self.accept is None) or self.accept(combination, result):
+                yield result
+
+
+
+# spaces of `lead` and `thread` --------------------------------
+
+def lead_space(
+        pitch_motif: PitchLine,
+        harmony: List[PitchClass],
+        steps: List[int] = [-1, 0, 1],
+        complete: bool = True,
+        similar: Optional[str] = 'direction'
+    ) -> Space:
+
+    """
+    Get the space of candidates `lead` chooses from.
+
+    Indexing and iterating the space give every candidate,
+    while `sample` and `filter` apply `complete` and `similar`,
+    `filter` and exact sampling through `ilead`'s pruned search.
+    """
+
+    nearest_pitches = _get_nearest_pitches(pitch_motif, harmony, steps)
+
+    def build(pitch_group):
+        return _replace(pitch_motif, list(pitch_group))
+
+    if not (complete or similar):
+        return Space(nearest_pitches, build)
+
+    if similar:
+        scale = _reify([])
+        proto = _as_line(pitch_motif)
+        contour = _get_contour(proto, similar, scale)
+
+    def accept(pitch_group, motif):
+        if complete and not _is_complete(pitch_group, harmony):
+            return False
+
+        if similar:
+            motif = _as_line(motif)
+            return _get_contour(motif, similar, scale) == contour
+
+        return True
+
+    def search():
+        return ilead(pitch_motif, harmony, steps, complete, similar)
+
+    return Space(nearest_pitches, build, accept, search)
+
+
+def thread_space(
+        pitch_motif: PitchLine,
+        duration_motif: DurationLine,
+        harmonies: List[List[PitchClass]],
+        durations: DurationLine,
+        steps: List[int]
+    ) -> Space:
+
+    """
+    Get the space of the motifs `thread` returns.
+    """
+
+    groups = _thread_groups(
+        pitch_motif, duration_motif, harmonies, durations, steps
+    )
+
+    def build(variants):
+        return list(chain(*variants))
+
+    return Space(groups, build)
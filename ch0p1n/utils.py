@@ -1,39 +1,47 @@
-import music21
-from typing import List, Union
-from copy import deepcopy
-from ch0p1n.motif import Pitch, PitchLine, DurationLine
+import os
+import struct
+from functools import lru_cache
+from typing import (
+    List, Union, Tuple, Optional, Iterable, Iterator, BinaryIO
+)
+from concurrent.futures import ProcessPoolExecutor
+from ch0p1n.motif import (
+    Pitch, PitchLine, DurationLine, DurationIndex, MotifArray, _TOLERANCE
+)
+from ch0p1n.instrument import timed
 
 
 
 # notations -> MIDI note numbers -------------------------------
 
+_NOTE_NAMES = {
+    'C': 0,
+    'D': 2,
+    'E': 4,
+    'F': 5,
+    'G': 7,
+    'A': 9,
+    'B': 11
+}
+
+_ACCIDENTALS = {
+    '': 0,
+    '#': 1,
+    '##': 2,
+    '-': -1,
+    '--': -2
+}
+
+
 def _to_pitch(notation: str) -> Pitch:
 
     """
     Convert the given notation to pitch.
     """
 
-    note_names = {
-        'C': 0,
-        'D': 2,
-        'E': 4,
-        'F': 5,
-        'G': 7,
-        'A': 9,
-        'B': 11
-    }
-
-    accidentals = {
-        '': 0,
-        '#': 1,
-        '##': 2,
-        '-': -1,
-        '--': -2
-    }
-
-    pitch = note_names[notation[0].upper()] + \
+    pitch = _NOTE_NAMES[notation[0].upper()] + \
         12 * (int(notation[-1]) + 1) + \
-        accidentals[notation[1:-1]]
+        _ACCIDENTALS[notation[1:-1]]
 
     return pitch
 
@@ -54,6 +62,132 @@ def to_pitch_line(notation_line: list) -> None:
 
 
 
+# read notation corpora ---------------------------------------
+
+_TOKENS = {'_': None}
+# the items of parsed tokens, `_` being a rest
+
+_MAX_TOKENS = 1 << 16
+
+
+def _to_item(token: str) -> Optional[Pitch]:
+
+    """
+    Convert a token, a MIDI note number, a notation or `_`, to an item,
+    remembering the result.
+    Pitches out of the MIDI range 0-127 are invalid.
+    """
+
+    item = _TOKENS.get(token, token)
+
+    if item is not token:
+        return item
+
+    try:
+        if token.isdigit():
+            item = int(token)
+        else:
+            item = _to_pitch(token)
+    except (KeyError, ValueError, IndexError):
+        item = None
+
+    if (item is None) or not 0 <= item <= 127:
+        raise ValueError('invalid notation: {!r}'.format(token))
+
+    if len(_TOKENS) < _MAX_TOKENS:
+        _TOKENS[token] = item
+
+    return item
+
+
+def _parse(text: str) -> PitchLine:
+
+    """
+    Parse a notation line, such as `60 B-5 _ [61 c##2]`, to a pitch line.
+    """
+
+    tokens = _TOKENS
+
+    # lines without chords, of known tokens
+    if '[' not in text and ']' not in text:
+        try:
+            return list(map(tokens.__getitem__, text.split()))
+        except KeyError:
+            pass
+
+    pitch_line = []
+    chord = None
+
+    # brackets are spaced out, so that one split gives all tokens
+    for token in text.replace('[', ' [ ').replace(']', ' ] ').split():
+        if token == '[':
+            if chord is not None:
+                raise ValueError('nested chord')
+            chord = []
+        elif token == ']':
+            if chord is None:
+                raise ValueError('unmatched "]"')
+            pitch_line.append(chord)
+            chord = None
+        else:
+            # known tokens, in chords as well, are looked up directly
+            try:
+                item = tokens[token]
+            except KeyError:
+                item = _to_item(token)
+
+            if chord is None:
+                pitch_line.append(item)
+            else:
+                chord.append(item)
+
+    if chord is not None:
+        raise ValueError('unmatched "["')
+
+    return pitch_line
+
+
+def read_notation_lines(
+        source: Union[str, os.PathLike, Iterable[str]],
+        motif_array: bool = False
+    ) -> Iterator[Union[PitchLine, MotifArray]]:
+
+    """
+    Read notation lines, one per line of a text file, as pitch lines,
+    or as motif arrays if `motif_array` is true.
+
+    `source` is the path of the file, or an iterable of lines,
+    such as an opened file. Lines are read one at a time,
+    and blank lines are skipped.
+
+    Examples
+    --------
+    >>> list(read_notation_lines(['60 B-5 _ [61 c##2]']))
+    [[60, 82, None, [61, 38]]]
+    """
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source) as file:
+            yield from read_notation_lines(file, motif_array)
+        return
+
+    for n, text in enumerate(source, 1):
+        try:
+            pitch_line = _parse(text)
+        except ValueError as error:
+            raise ValueError('line {}: {}'.format(n, error)) from None
+
+        # blank lines
+        if not pitch_line:
+            continue
+
+        if motif_array:
+            yield MotifArray.from_lines(pitch_line)
+        else:
+            yield pitch_line
+
+
+
 # MIDI note numbers -> notations -------------------------------
 
 def _get_scale(key: int) -> List[str]:
@@ -77,6 +211,10 @@ def _get_scale(key: int) -> List[str]:
     return pitch_classes
 
 
+_STEPS = {pitch_class: step for step, pitch_class in _NOTE_NAMES.items()}
+_ALTERS = {alter: accidental for accidental, alter in _ACCIDENTALS.items()}
+
+
 def _to_notations(pitch: Pitch) -> List[str]:
 
     """
@@ -97,14 +235,12 @@ def _to_notations(pitch: Pitch) -> List[str]:
         else:
             o = octave
 
-        try:
-            i = [0, 2, 4, 5, 7, 9, 11].index(pc % 12)
-        except:
+        step = _STEPS.get(pc % 12)
+
+        if step is None:
             continue
-        
-        step = ['C', 'D', 'E', 'F', 'G', 'A', 'B'][i]
-        acci = {0: '', 1: '#', 2: '##', -1: '-', -2: '--'}[alter]
-        notation = step + acci + str(o)
+
+        notation = step + _ALTERS[alter] + str(o)
         notations.append(notation)
 
     return notations
@@ -133,40 +269,85 @@ def _to_notation(
         return pitch
 
 
-def _to_notation_lines(
-        pitch_lines: List[PitchLine],
-        key: int
-    ) -> None:
+@lru_cache(maxsize=None)
+def _get_spellings(key: int) -> Tuple[Union[Pitch, str], ...]:
 
     """
-    Convert pitches to notations in the given pitch lines.
+    Get the notations of all MIDI note numbers in the given key,
+    built once per key.
     """
 
     scale = _get_scale(key)
+    return tuple(_to_notation(pitch, scale) for pitch in range(128))
 
-    for i, line in enumerate(pitch_lines):
-        for j, item in enumerate(line):
-            if isinstance(item, int):
-                pitch_lines[i][j] = _to_notation(item, scale)
-            elif isinstance(item, list):
-                pitch_lines[i][j] = [
-                    _to_notation(pitch, scale)
-                    for pitch in item
-                ]
+
+@timed
+def to_notation_lines(
+        pitch_lines: List[PitchLine],
+        key: int = 0
+    ) -> List[list]:
+
+    """
+    Convert pitches to notations in the given key.
+    Pitches that are off the key stay as they are.
+
+    Examples
+    --------
+    >>> to_notation_lines([[60, [61, 66], None]], 1)
+    [['C4', [61, 'F#4'], None]]
+    """
+
+    spellings = _get_spellings(key)
+    scale = None
+
+    notation_lines = []
+
+    for line in pitch_lines:
+        notation_line = []
+
+        for item in line:
+            if isinstance(item, (list, tuple)):
+                chord = []
+
+                for pitch in item:
+                    if isinstance(pitch, int) and 0 <= pitch < 128:
+                        chord.append(spellings[pitch])
+                    elif isinstance(pitch, int):
+                        scale = scale or _get_scale(key)
+                        chord.append(_to_notation(pitch, scale))
+                    else:
+                        chord.append(pitch)
+
+                item = chord
+            elif isinstance(item, int) and 0 <= item < 128:
+                item = spellings[item]
+            elif isinstance(item, int):
+                scale = scale or _get_scale(key)
+                item = _to_notation(item, scale)
+
+            notation_line.append(item)
+
+        notation_lines.append(notation_line)
+
+    return notation_lines
 
 
 
 # show music ---------------------------------------------------
 
+@timed
 def _to_stream(
         pitch_lines: List[PitchLine],
         duration_lines: List[DurationLine]
-    ) -> music21.stream.Stream:
+    ) -> 'music21.stream.Stream':
     
     """
     Merge the given pitch and duration lines into
     a music21 Stream object.
     """
+
+    # music21 is slow to import and only needed here and in `show`
+    import music21
     
     stream = music21.stream.Stream()
 
@@ -194,45 +375,36 @@ def _to_stream(
     return stream
 
 
-def show(
+@timed
+def _to_score(
         pitch_lines: List[PitchLine],
         duration_lines: List[DurationLine],
         group: int = 1,
         key: int = 0,
         meter: str = '4/4',
         clefs: List[str] = ['g', 'f']
-    ) -> None:
-    
-    """
-    Show music.
-
-    Parameters
-    ----------
-    group: int
-        The number of voices in the treble staff.
+    ) -> 'music21.stream.Score':
 
-    Examples
-    --------
-    >>> pitch_lines = [[60, [62, 63]], [None, 40]]
-    >>> duration_lines = [[1, 1], [1, 1]]
-    >>> show(pitch_lines, duration_lines)
     """
+    Convert music to a music21 Score object. See `show`.
+    """
+
+    import music21
 
-    pitch_lines = deepcopy(pitch_lines)
-    _to_notation_lines(pitch_lines, key)
+    pitch_lines = to_notation_lines(pitch_lines, key)
     
     # convert `key` and `meter` to music21 objects
     key = music21.key.KeySignature(key)
     meter = music21.meter.TimeSignature(meter)
 
-    # convert items in `clefs` to music21 objects
-    for i, clef in enumerate(clefs):
-        if clef == 'g':
-            clefs[i] = music21.clef.TrebleClef()
-        elif clef == 'f':
-            clefs[i] = music21.clef.BassClef()
+    # convert items in `clefs` to music21 objects,
+    # without changing `clefs`
+    constructs = {
+        'g': music21.clef.TrebleClef,
+        'f': music21.clef.BassClef
+    }
 
-    clef_1, clef_2 = clefs
+    clef_1, clef_2 = [constructs[clef]() for clef in clefs]
 
     # setup score
     score = music21.stream.Score()
@@ -245,7 +417,7 @@ def show(
     score.append([layout, staff_1, staff_2])
 
     # total duration
-    duration = sum(duration_lines[0])
+    duration = DurationIndex(duration_lines[0]).total
     # number of lines
     l = len(pitch_lines)
 
@@ -283,4 +455,368 @@ def show(
     score[0][0].insert(0, key)
     score[1][0].insert(0, key)
 
+    return score
+
+
+def show(
+        pitch_lines: List[PitchLine],
+        duration_lines: List[DurationLine],
+        group: int = 1,
+        key: int = 0,
+        meter: str = '4/4',
+        clefs: List[str] = ['g', 'f']
+    ) -> None:
+    
+    """
+    Show music.
+
+    Parameters
+    ----------
+    group: int
+        The number of voices in the treble staff.
+
+    Examples
+    --------
+    >>> pitch_lines = [[60, [62, 63]], [None, 40]]
+    >>> duration_lines = [[1, 1], [1, 1]]
+    >>> show(pitch_lines, duration_lines)
+    """
+
+    score = _to_score(
+        pitch_lines, duration_lines, group, key, meter, clefs
+    )
+
     score.show('xml')
+
+
+
+# render music -------------------------------------------------
+
+_EXTENSIONS = {
+    'musicxml': '.musicxml',
+    'midi': '.mid'
+}
+
+
+@timed
+def render(
+        pitch_lines: List[PitchLine],
+        duration_lines: List[DurationLine],
+        group: int = 1,
+        key: int = 0,
+        meter: str = '4/4',
+        clefs: List[str] = ['g', 'f'],
+        fmt: str = 'musicxml', # 'midi'
+        path: Union[str, os.PathLike, None] = None
+    ) -> Optional[bytes]:
+
+    """
+    Render music without opening any application,
+    the way `show` lays it out.
+
+    Returns the rendered bytes, or writes them to `path` if given.
+
+    Examples
+    --------
+    >>> pitch_lines = [[60, [62, 63]], [None, 40]]
+    >>> duration_lines = [[1, 1], [1, 1]]
+    >>> render(pitch_lines, duration_lines, path='music.musicxml')
+    """
+
+    import music21
+
+    score = _to_score(
+        pitch_lines, duration_lines, group, key, meter, clefs
+    )
+
+    if fmt == 'musicxml':
+        exporter = music21.musicxml.m21ToXml.GeneralObjectExporter(score)
+        data = exporter.parse()
+    elif fmt == 'midi':
+        data = music21.midi.translate.streamToMidiFile(score).writestr()
+    else:
+        raise ValueError('Unknown format: {}'.format(fmt))
+
+    if path is None:
+        return data
+
+    _write(data, path)
+
+
+def _render(args: tuple) -> Optional[bytes]:
+
+    """
+    Call `render` with packed arguments, for process pools.
+    """
+
+    return render(*args)
+
+
+def render_many(
+        variants: List[Tuple[List[PitchLine], List[DurationLine]]],
+        group: int = 1,
+        key: int = 0,
+        meter: str = '4/4',
+        clefs: List[str] = ['g', 'f'],
+        fmt: str = 'musicxml', # 'midi'
+        directory: Union[str, os.PathLike, None] = None,
+        workers: Optional[int] = None
+    ) -> List[Union[bytes, str]]:
+
+    """
+    Render variants of music, each a pair of pitch lines and duration
+    lines, in `workers` processes.
+
+    Returns the rendered bytes of each variant in order,
+    or, if `directory` is given, writes each variant to a file
+    named by its index and returns the paths.
+    """
+
+    paths = [None] * len(variants)
+
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+
+        paths = [
+            os.path.join(directory, str(i) + _EXTENSIONS[fmt])
+            for i in range(len(variants))
+        ]
+
+    tasks = [
+        (pitch_lines, duration_lines, group, key, meter, clefs, fmt, path)
+        for (pitch_lines, duration_lines), path in zip(variants, paths)
+    ]
+
+    if (workers is None) or (workers <= 1):
+        results = [_render(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_render, tasks))
+
+    if directory is not None:
+        return paths
+
+    return results
+
+
+
+# export MIDI --------------------------------------------------
+
+def _to_vlq(n: int) -> bytes:
+
+    """
+    Encode a number as a MIDI variable-length quantity.
+    """
+
+    data = [n & 0x7f]
+    n = n >> 7
+
+    while n:
+        data.append(0x80 | (n & 0x7f))
+        n = n >> 7
+
+    return bytes(reversed(data))
+
+
+def _to_chunk(kind: bytes, data: bytes) -> bytes:
+
+    """
+    Wrap data into a MIDI chunk.
+    """
+
+    return kind + struct.pack('>I', len(data)) + data
+
+
+def _to_track(
+        pitch_lines: List[PitchLine],
+        duration_lines: List[DurationLine],
+        channel: int,
+        ppq: int
+    ) -> bytes:
+
+    """
+    Convert pitch lines played one after another into a MIDI track.
+    """
+
+    # (tick, is note-on, pitch)
+    events = []
+    onset = 0
+
+    for pitch_line, duration_line in zip(pitch_lines, duration_lines):
+        for item, duration in zip(pitch_line, duration_line):
+            duration = abs(duration) # see `elaborate`
+            start = round(onset * ppq)
+            onset = onset + duration
+
+            # a note that rounds to no ticks would end before it starts
+            end = max(round(onset * ppq), start + 1)
+
+            if item is None:
+                continue
+
+            for pitch in item if isinstance(item, list) else [item]:
+                if pitch is None:
+                    continue
+
+                if not 0 <= pitch < 128:
+                    raise ValueError(
+                        'Pitch out of MIDI range: {}'.format(pitch)
+                    )
+
+                events.append((start, 1, pitch))
+                events.append((end, 0, pitch))
+
+    # note-offs go before note-ons at the same tick
+    events.sort()
+
+    data = bytearray()
+    tick = 0
+
+    for time, on, pitch in events:
+        status = (0x90 if on else 0x80) | channel
+        data += _to_vlq(time - tick)
+        data += bytes([status, pitch, 64 if on else 0])
+        tick = time
+
+    data += b'\x00\xff\x2f\x00'
+    return _to_chunk(b'MTrk', bytes(data))
+
+
+@timed
+def _to_midi(
+        variants: List[Tuple[List[PitchLine], List[DurationLine]]],
+        tempo: float,
+        ppq: int
+    ) -> bytes:
+
+    """
+    Convert variants of music played one after another into
+    a Standard MIDI File, with one track for each line.
+    """
+
+    n = max(len(pitch_lines) for pitch_lines, _ in variants)
+
+    # skip channel 10, which is for percussion
+    channels = [channel for channel in range(16) if channel != 9]
+
+    # the tempo track
+    microseconds = round(60000000 / tempo)
+    tempo_track = b'\x00\xff\x51\x03' + microseconds.to_bytes(3, 'big') + \
+        b'\x00\xff\x2f\x00'
+
+    chunks = [
+        _to_chunk(b'MThd', struct.pack('>HHH', 1, n + 1, ppq)),
+        _to_chunk(b'MTrk', tempo_track)
+    ]
+
+    # the length of each line as `_to_track` plays it, see `elaborate`
+    lengths = [
+        [DurationIndex(map(abs, duration_line)).total
+            for duration_line in durations]
+        for _, durations in variants
+    ]
+
+    for i in range(n):
+        pitch_lines = []
+        duration_lines = []
+
+        for (lines, durations), totals in zip(variants, lengths):
+            # a variant lasts as long as its first line,
+            # and a line missing or shorter than that rests till its end
+            if i < len(lines):
+                pitch_line, duration_line = lines[i], durations[i]
+                rest = totals[0] - totals[i]
+            else:
+                pitch_line, duration_line = [], []
+                rest = totals[0]
+
+            if rest > _TOLERANCE:
+                pitch_line = [*pitch_line, None]
+                duration_line = [*duration_line, rest]
+
+            pitch_lines.append(pitch_line)
+            duration_lines.append(duration_line)
+
+        track = _to_track(
+            pitch_lines, duration_lines, channels[i % len(channels)], ppq
+        )
+
+        chunks.append(track)
+
+    return b''.join(chunks)
+
+
+def _write(data: bytes, path_or_buffer: Union[str, os.PathLike, BinaryIO]):
+
+    """
+    Write bytes to a path or a binary buffer at once.
+    """
+
+    if isinstance(path_or_buffer, (str, os.PathLike)):
+        with open(path_or_buffer, 'wb') as file:
+            file.write(data)
+    else:
+        path_or_buffer.write(data)
+
+
+@timed
+def export_midi(
+        pitch_lines: List[PitchLine],
+        duration_lines: List[DurationLine],
+        tempo: float = 120,
+        ppq: int = 480,
+        path_or_buffer: Union[str, os.PathLike, BinaryIO] = 'music.mid'
+    ) -> None:
+
+    """
+    Write music to a Standard MIDI File, with one track for each line.
+
+    Parameters
+    ----------
+    tempo: float
+        The number of quarter notes per minute.
+    ppq: int
+        The number of ticks per quarter note.
+
+    Examples
+    --------
+    >>> pitch_lines = [[60, [62, 63]], [None, 40]]
+    >>> duration_lines = [[1, 1], [1, 1]]
+    >>> export_midi(pitch_lines, duration_lines, 90, 480, 'music.mid')
+    """
+
+    data = _to_midi([(pitch_lines, duration_lines)], tempo, ppq)
+    _write(data, path_or_buffer)
+
+
+def export_midi_many(
+        variants: List[Tuple[List[PitchLine], List[DurationLine]]],
+        tempo: float = 120,
+        ppq: int = 480,
+        path_or_buffer: Union[str, os.PathLike, BinaryIO] = 'music.mid',
+        directory: Union[str, os.PathLike, None] = None
+    ) -> Optional[List[str]]:
+
+    """
+    Write variants of music, each a pair of pitch lines and duration lines,
+    to one MIDI file where they play one after another,
+    or, if `directory` is given, to one file for each variant
+    named by its index, returning the paths as `render_many` does.
+    Each file is written at once.
+    """
+
+    if directory is None:
+        data = _to_midi(variants, tempo, ppq)
+        _write(data, path_or_buffer)
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+
+    for i, variant in enumerate(variants):
+        path = os.path.join(directory, str(i) + _EXTENSIONS['midi'])
+        data = _to_midi([variant], tempo, ppq)
+        _write(data, path)
+        paths.append(path)
+
+    return paths
@@ -0,0 +1,106 @@
+import time
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from ch0p1n.motif import lead, thread
+from ch0p1n.utils import render
+from ch0p1n.aio import alead, athread, arender, _iterate
+
+
+class TestALead(unittest.IsolatedAsyncioTestCase):
+    async def test(self):
+        chunks = [
+            chunk async for chunk in
+            alead([55, 60, 64, 67], [2, 7, 11], chunksize=3)
+        ]
+
+        expected = lead([55, 60, 64, 67], [2, 7, 11])
+        self.assertEqual(sum(chunks, []), expected)
+        self.assertTrue(all(len(chunk) == 3 for chunk in chunks[:-1]))
+
+    async def test_cancel(self):
+        # the search runs for long without finding a motif
+        executor = ThreadPoolExecutor(1)
+        chunks = alead([62]*24 + [69], [0, 4, 7, 11], similar=None,
+            executor=executor)
+        task = asyncio.create_task(chunks.__anext__())
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        start = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(
+            None, executor.shutdown
+        )
+        self.assertLess(time.perf_counter() - start, 1)
+
+
+class TestAThread(unittest.IsolatedAsyncioTestCase):
+    async def test(self):
+        args = [60, 62, 64, 65], [1, 1, 1, 1], [[0, 4, 7], [7, 11, 2]], \
+            [2, 2], [-1, 0, 1]
+        chunks = [chunk async for chunk in athread(*args, chunksize=4)]
+        self.assertEqual(sum(chunks, []), thread(*args))
+
+
+class Test_iterate(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.produced = 0
+        self.closed = False
+
+    def count(self):
+        try:
+            while True:
+                time.sleep(0.001)
+                self.produced = self.produced + 1
+                yield self.produced
+        finally:
+            self.closed = True
+
+    async def test_backpressure(self):
+        chunks = _iterate(self.count(), 5, None)
+        self.assertEqual(await chunks.__anext__(), [1, 2, 3, 4, 5])
+
+        # nothing is produced until the next chunk is asked for
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.produced, 5)
+
+        await chunks.aclose()
+        self.assertTrue(self.closed)
+
+    async def test_cancel(self):
+        async def consume():
+            async for _ in _iterate(self.count(), 10**6, None):
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        # the chunk in progress stops early
+        await asyncio.sleep(0.05)
+        self.assertTrue(self.closed)
+        produced = self.produced
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.produced, produced)
+
+
+class TestARender(unittest.IsolatedAsyncioTestCase):
+    async def test(self):
+        variants = [([[60]], [[1]]), ([[62], [50]], [[2], [2]])]
+        expected = [render(*variant, fmt='midi') for variant in variants]
+
+        out = [data async for data in arender(variants, fmt='midi')]
+        self.assertEqual(out, expected)
+
+        async def agenerate():
+            for variant in variants:
+                yield variant
+
+        out = [data async for data in arender(agenerate(), fmt='midi')]
+        self.assertEqual(out, expected)
@@ -0,0 +1,97 @@
+import os
+import zlib
+import unittest
+import tempfile
+from unittest import mock
+from ch0p1n.motif import lead, thread, PitchMotif
+from ch0p1n.cache import DiskCache
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = DiskCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lead(self):
+        expected = lead([60, 64, 67], [5, 9, 0])
+        self.assertEqual(self.cache.lead([60, 64, 67], [5, 9, 0]), expected)
+        self.assertEqual(len(self.cache), 1)
+
+        # equivalent inputs are read from the cache
+        with mock.patch('ch0p1n.motif.lead') as function:
+            out = self.cache.lead(PitchMotif([60, 64, 67]), [0, 9, 5, 0])
+            function.assert_not_called()
+
+        self.assertEqual(out, expected)
+
+        # other inputs are not
+        self.cache.lead([60, 64, 67], [5, 9, 0], similar=None)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_thread(self):
+        args = [60, 62, 64, 65], [1, 1, 1, 1], [[0, 4, 7], [7, 11, 2]], \
+            [2, 2], [-1, 0, 1]
+        expected = thread(*args)
+        self.assertEqual(self.cache.thread(*args), expected)
+
+        with mock.patch('ch0p1n.motif.thread') as function:
+            self.assertEqual(self.cache.thread(*args), expected)
+            function.assert_not_called()
+
+    def test_get(self):
+        self.assertIsNone(self.cache.get('ab' * 32))
+        self.cache.set('ab' * 32, [[60]])
+        self.assertEqual(self.cache.get('ab' * 32), [[60]])
+
+        # a broken file is a miss
+        with open(self.cache._path('ab' * 32), 'wb') as file:
+            file.write(b'broken')
+
+        self.assertEqual(self.cache.get('ab' * 32, 0), 0)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_get_unpicklable(self):
+        # a missing module and a missing attribute
+        for data in b'cno_such_module\nX\n.', b'cos\nno_such_name\n.':
+            self.cache.set('ab' * 32, None)
+
+            with open(self.cache._path('ab' * 32), 'wb') as file:
+                file.write(zlib.compress(data))
+
+            self.assertEqual(self.cache.get('ab' * 32, 0), 0)
+            self.assertEqual(len(self.cache), 0)
+
+    def test_evict(self):
+        self.cache.set('a' * 64, list(range(1000)))
+        self.cache.set('b' * 64, list(range(1000)))
+        self.cache.max_size = self.cache.size - 1
+
+        # make 'a' older, then read it, making 'b' the least recent
+        os.utime(self.cache._path('a' * 64), (0, 0))
+        os.utime(self.cache._path('b' * 64), (1, 1))
+        self.cache.get('a' * 64)
+        self.cache.evict()
+
+        self.assertIsNotNone(self.cache.get('a' * 64))
+        self.assertIsNone(self.cache.get('b' * 64))
+
+    def test_evict_on_demand(self):
+        self.cache.set('a' * 64, 1)
+
+        # the directory is not scanned while the cache fits
+        with mock.patch.object(self.cache, 'evict') as evict:
+            self.cache.set('b' * 64, 2)
+            evict.assert_not_called()
+
+            self.cache.max_size = self.cache.size - 1
+            self.cache.set('c' * 64, 3)
+            evict.assert_called_once()
+
+    def test_clear(self):
+        self.cache.set('a' * 64, 1)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
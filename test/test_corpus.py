@@ -0,0 +1,67 @@
+import os
+import unittest
+import tempfile
+from ch0p1n.motif import ilead, lead, MotifArray, PitchMotif
+from ch0p1n.corpus import CorpusWriter, Corpus
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'motifs.corpus')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test(self):
+        records = [
+            ([60, None, [62, 65]], [1, 0.5, 1/3]),
+            (PitchMotif([[], 127, 0]), [2, -1, 0.25]),
+            (MotifArray.from_lines([61], [4]), None)
+        ]
+
+        with CorpusWriter(self.path) as writer:
+            for pitch_motif, duration_motif in records:
+                writer.append(pitch_motif, duration_motif)
+
+        expected = [
+            ([60, None, [62, 65]], [1, 0.5, 1/3]),
+            ([[], 127, 0], [2, -1, 0.25]),
+            ([61], [4])
+        ]
+
+        with Corpus(self.path) as corpus:
+            self.assertEqual(len(corpus), 3)
+            self.assertEqual(corpus[1], expected[1])
+            self.assertEqual(corpus[-1], expected[-1])
+            self.assertEqual(corpus[::2], expected[::2])
+            self.assertEqual(list(corpus), expected)
+            self.assertRaises(IndexError, corpus.__getitem__, 3)
+
+        with Corpus(self.path, motif_array=True) as corpus:
+            out = corpus[0]
+            expected = MotifArray.from_lines(*expected[0])
+            self.assertEqual(out, expected)
+
+    def test_stream(self):
+        with CorpusWriter(self.path, durations=False) as writer:
+            writer.extend(ilead([60, 64, 67], [5, 9, 0]))
+
+        with Corpus(self.path) as corpus:
+            out = [pitch_line for pitch_line, _ in corpus]
+            self.assertEqual(out, lead([60, 64, 67], [5, 9, 0]))
+            self.assertIsNone(corpus[0][1])
+
+    def test_error(self):
+        with CorpusWriter(self.path) as writer:
+            self.assertRaises(ValueError, writer.append, [128], [1])
+            self.assertRaises(ValueError, writer.append, [60], [1/7])
+            self.assertRaises(ValueError, writer.append, [60])
+
+        with Corpus(self.path) as corpus:
+            self.assertEqual(len(corpus), 0)
+
+        with open(self.path, 'wb') as file:
+            file.write(b'\0' * 64)
+
+        self.assertRaises(ValueError, Corpus, self.path)
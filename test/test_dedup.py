@@ -0,0 +1,71 @@
+import unittest
+from ch0p1n.motif import PitchMotif, MotifArray
+from ch0p1n.dedup import (
+    transposed, to_degrees, BloomFilter, dedup
+)
+
+
+class TestTransposed(unittest.TestCase):
+    def test(self):
+        out = transposed([None, 62, [64, 69]])
+        expected = PitchMotif([None, 60, [62, 67]])
+        self.assertEqual(out, expected)
+
+    def test_rests(self):
+        self.assertEqual(transposed([None, []]), PitchMotif([None, []]))
+
+
+class TestToDegrees(unittest.TestCase):
+    def test(self):
+        harmony = [0, 4, 7]
+        out = to_degrees([64, 67, [72, 74]], harmony)
+        expected = PitchMotif([0, 1, [2, 2.5]])
+        self.assertEqual(out, expected)
+
+        # the same motif a step up along the harmony
+        self.assertEqual(to_degrees([67, 72, [76, 77]], harmony), expected)
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test(self):
+        bloom = BloomFilter(1000, 0.01)
+        keys = [PitchMotif([i, None, [i+4, i+7]]) for i in range(1000)]
+
+        self.assertEqual(sum(bloom.add(key) for key in keys), len(bloom))
+        self.assertTrue(all(key in bloom for key in keys))
+        self.assertFalse(any(bloom.add(key) for key in keys))
+
+        others = [PitchMotif([i, i]) for i in range(1000)]
+        self.assertLess(sum(key in bloom for key in others), 50)
+
+
+class TestDedup(unittest.TestCase):
+    pitch_motifs = [[60, [64, 67]], [60, [64, 67]], [62, [66, 69]], [62, 65]]
+
+    def test(self):
+        out = list(dedup(self.pitch_motifs))
+        expected = [[60, [64, 67]], [62, [66, 69]], [62, 65]]
+        self.assertEqual(out, expected)
+
+        out = list(dedup(self.pitch_motifs, capacity=100))
+        self.assertEqual(out, expected)
+
+    def test_canonical(self):
+        out = list(dedup(self.pitch_motifs, 'transposition'))
+        expected = [[60, [64, 67]], [62, 65]]
+        self.assertEqual(out, expected)
+
+        # D minor is C major a step up along the scale, D major is not
+        scale = [0, 2, 4, 5, 7, 9, 11]
+        pitch_motifs = [[60, [64, 67]], [62, [65, 69]], [62, [66, 69]]]
+        out = list(dedup(pitch_motifs, 'degree', scale))
+        expected = [[60, [64, 67]], [62, [66, 69]]]
+        self.assertEqual(out, expected)
+
+    def test_motif_array(self):
+        motifs = [MotifArray.from_lines(m) for m in self.pitch_motifs]
+        self.assertEqual(len(list(dedup(motifs))), 3)
+
+    def test_error(self):
+        self.assertRaises(ValueError, dedup, [[60]], 'chromatic')
+        self.assertRaises(ValueError, dedup, [[60]], 'degree')
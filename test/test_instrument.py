@@ -0,0 +1,69 @@
+import json
+import unittest
+from ch0p1n import instrument
+from ch0p1n.motif import lead, thread, elaborate
+from ch0p1n.utils import to_notation_lines
+
+
+class TestRecord(unittest.TestCase):
+    def test_lead(self):
+        with instrument.record() as recorder:
+            motifs = lead([60, 64, 67], [5, 9, 0])
+
+        out = recorder.to_dict()
+        expected = {
+            'motif._search.nodes': 13,
+            'motif._search.incomplete': 4,
+            'motif._search.dissimilar': 2
+        }
+        self.assertEqual(out['counters'], expected)
+        self.assertEqual(out['timers']['motif.lead']['calls'], 1)
+        self.assertEqual(
+            out['timers']['motif._replace']['calls'],
+            len(motifs)
+        )
+
+    def test_stages(self):
+        with instrument.record() as recorder:
+            thread([60, 62, 64, 65], [1, 1, 1, 1], [[0, 4, 7], [7, 11, 2]],
+                [2, 2], [-1, 0, 1])
+            elaborate([60, 62], [1, 1], 0, [1], [0, 2, 4, 5, 7, 9, 11])
+            to_notation_lines([[60, 62]])
+
+        out = json.loads(recorder.to_json())['timers']
+        self.assertEqual(out['motif.thread']['calls'], 1)
+        self.assertEqual(out['motif._segment']['calls'], 1)
+        self.assertEqual(out['motif._transpose']['calls'], 6)
+        self.assertEqual(out['motif.elaborate']['calls'], 1)
+        self.assertEqual(out['utils.to_notation_lines']['calls'], 1)
+
+    def test_nested(self):
+        with instrument.record() as outer:
+            with instrument.record() as inner:
+                lead([60, 64, 67], [5, 9, 0])
+
+            self.assertIs(instrument.get_recorder(), outer)
+
+        self.assertIsNone(instrument.get_recorder())
+        self.assertIn('motif.lead', inner.timers)
+        self.assertEqual(outer.to_dict(), {'counters': {}, 'timers': {}})
+
+
+class TestEnable(unittest.TestCase):
+    def test(self):
+        recorder = instrument.enable()
+
+        try:
+            lead([60, 64, 67], [5, 9, 0])
+            self.assertIs(instrument.get_recorder(), recorder)
+        finally:
+            instrument.disable()
+
+        self.assertIsNone(instrument.get_recorder())
+        self.assertEqual(recorder.timers['motif.lead'][0], 1)
+
+        lead([60, 64, 67], [5, 9, 0])
+        self.assertEqual(recorder.timers['motif.lead'][0], 1)
+
+        recorder.reset()
+        self.assertEqual(recorder.to_dict(), {'counters': {}, 'timers': {}})
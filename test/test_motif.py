@@ -1,5 +1,11 @@
 import unittest
+from unittest import mock
 from ch0p1n.motif import (
+    MotifArray,
+    PitchMotif,
+    DurationMotif,
+    DurationIndex,
+    Scale,
     _reify,
     _move,
     _move2,
@@ -7,13 +13,22 @@ from ch0p1n.motif import (
     _replace,
     rescale,
     transpose,
+    transpose_many,
     lead,
+    ilead,
     stretch,
     thread,
+    enable_cache,
+    disable_cache,
+    clear_cache,
+    cache_info,
+    ithread,
     _segment,
     _access,
     is_complete,
+    _measure,
     is_similar,
+    is_similar_many,
     elaborate,
     reduce,
     divide,
@@ -21,6 +36,140 @@ from ch0p1n.motif import (
 )
 
 
+class TestPitchMotif(unittest.TestCase):
+    pitch_line = [60, [64, 67], None]
+    motif = PitchMotif(pitch_line)
+
+    def test_line(self):
+        self.assertEqual(self.motif, (60, (64, 67), None))
+        self.assertEqual(self.motif.to_line(), self.pitch_line)
+        self.assertEqual(len({self.motif, PitchMotif(self.pitch_line)}), 1)
+
+    def test_transpose(self):
+        out = transpose(self.motif, [0, 4, 7, 9], 1)
+        expected = PitchMotif([64, [67, 69], None])
+        self.assertEqual(out, expected)
+        self.assertIsInstance(out, PitchMotif)
+
+    def test_share(self):
+        out = rescale(self.motif, {0: 2})
+        self.assertEqual(out, (62, (64, 67), None))
+        self.assertIs(out[1], self.motif[1])
+        self.assertIs(rescale(self.motif, {1: 2}), self.motif)
+
+    def test_stretch(self):
+        motif = PitchMotif([60, [62, 64], None, 67])
+        out = stretch(motif, 0, 1, [0, 4, 7], 1)
+        expected = PitchMotif([64, [64, 67], None, 67])
+        self.assertEqual(out, expected)
+        self.assertIsInstance(out, PitchMotif)
+
+    def test_reduce(self):
+        out = reduce(self.motif, DurationMotif([1, 1, 2]), 1, 1, 'right')
+        expected = (PitchMotif([60, None]), DurationMotif([1, 3]))
+        self.assertEqual(out, expected)
+        self.assertIsInstance(out[1], DurationMotif)
+
+
+class TestDurationIndex(unittest.TestCase):
+    index = DurationIndex([1, 8, 1, 3])
+
+    def test_at(self):
+        out = [self.index.at(t) for t in [-1, 0, 0.5, 1, 9, 12.5, 13]]
+        expected = [None, 0, 0, 1, 2, 3, None]
+        self.assertEqual(out, expected)
+
+    def test_within(self):
+        self.assertEqual(self.index.within(1, 10), range(1, 3))
+        self.assertEqual(self.index.within(2, 9), range(2, 2))
+
+    def test_split(self):
+        out = self.index.split([4, 8, 10])
+        expected = [[0, 1], [], [2], [3]]
+        self.assertEqual(out, expected)
+
+    def test_split_thirds(self):
+        index = DurationIndex([1/2, 2/3, 2/3, 2/3, 1])
+        out = index.split([0.5, 1, 2, 2.5, 3.5])
+        expected = [[0], [1], [2, 3], [], [4], []]
+        self.assertEqual(out, expected)
+
+    def test_span(self):
+        self.assertEqual(self.index.span(1, 2), 9)
+        self.assertEqual(self.index.total, 13)
+
+
+class TestScale(unittest.TestCase):
+    scale = Scale([7, 0, 4])
+
+    def test_reuse(self):
+        self.assertIs(Scale([0, 4, 7, 4]), self.scale)
+        self.assertEqual(hash(_reify([4, 7, 0])), hash(self.scale))
+
+    def test_index(self):
+        self.assertIn(64, self.scale)
+        self.assertNotIn(62, self.scale)
+        self.assertEqual(self.scale.index(60), 15)
+
+    def test_move_off_scale(self):
+        self.assertEqual(self.scale.move(62, 1), 64)
+        self.assertEqual(self.scale.move(62, -1), 60)
+        self.assertEqual(self.scale.move(62, 2), 67)
+
+
+class TestMotifArray(unittest.TestCase):
+    pitch_motif = [60, None, [62, None], [64], []]
+    duration_motif = [1, 1/2, 1/2, -1, 1]
+    motif = MotifArray.from_lines(pitch_motif, duration_motif)
+
+    def test_lines(self):
+        out = self.motif.to_lines()
+        expected = (self.pitch_motif, self.duration_motif)
+        self.assertEqual(out, expected)
+        self.assertEqual(list(self.motif.offsets), [0, 1, 2, 4, 5, 5])
+
+    def test_typecodes(self):
+        out = [
+            array.typecode for array in
+            (self.motif.pitches, self.motif.offsets, self.motif.chords)
+        ]
+        self.assertEqual(out, ['h', 'H', 'B'])
+
+        # durations come back as floats
+        _, durations = MotifArray.from_lines([60], [1]).to_lines()
+        self.assertIsInstance(durations[0], float)
+
+    def test_top_of_range(self):
+        # pitches of a scale go up to 131, above the MIDI range
+        out = transpose(MotifArray.from_lines([125, 60]), list(range(12)), 3)
+        self.assertEqual(out, MotifArray.from_lines([128, 63]))
+
+        out = transpose(MotifArray.from_lines([128, 63]), list(range(12)), 3)
+        self.assertEqual(out, MotifArray.from_lines([131, 66]))
+
+    def test_transpose(self):
+        out = transpose(self.motif, list(range(12)), 1)
+        expected = MotifArray.from_lines(
+            [61, None, [63, None], [65], []],
+            self.duration_motif
+        )
+        self.assertEqual(out, expected)
+
+    def test_lead(self):
+        motif = MotifArray.from_lines([55, 60, 64, 67])
+        out = lead(motif, [2, 7, 11], [0, 1])
+        expected = lead([55, 60, 64, 67], [2, 7, 11], [0, 1])
+        self.assertEqual([m.to_lines()[0] for m in out], expected)
+
+    def test_fragment(self):
+        out = fragment(self.motif, 0, 2)
+        expected = MotifArray.from_lines(
+            self.pitch_motif[:3],
+            self.duration_motif[:3]
+        )
+        self.assertEqual(out, expected)
+
+
 class Test_move(unittest.TestCase):
     pitch = 60
     scale = _reify([11])
@@ -102,6 +251,28 @@ class TestTranspose(unittest.TestCase):
         self.assertEqual(out, expected)
 
 
+class TestTransposeMany(unittest.TestCase):
+    motifs = [[61, [62, 63], None], [60, 127]]
+    scale = [0, 4]
+    steps = [-1, 0, 1]
+
+    def test(self):
+        out = transpose_many(self.motifs, self.scale, self.steps)
+        expected = [
+            [transpose(motif, self.scale, step) for step in self.steps]
+            for motif in self.motifs
+        ]
+        self.assertEqual(out, expected)
+
+    def test_error(self):
+        out = transpose_many(self.motifs, self.scale, self.steps, True)
+        expected = [
+            [[60, [60, 60], None], [], [64, [64, 64], None]],
+            [[52, 124], [], []]
+        ]
+        self.assertEqual(out, expected)
+
+
 class TestLead(unittest.TestCase):
     def test(self):
         pitch_motif = [55, 60, 64, 67]
@@ -113,6 +284,102 @@ class TestLead(unittest.TestCase):
         ]
         self.assertEqual(out, expected)
 
+    def test_ordinal(self):
+        pitch_motif = [60, [64, 67], None, 64]
+        harmony = [0, 5, 9] # F
+        out = lead(pitch_motif, harmony, similar='ordinal')
+        expected = [
+            [57, [60, 65], None, 60],
+            [57, [60, 69], None, 65],
+            [57, [65, 65], None, 60],
+            [57, [65, 69], None, 60],
+            [60, [60, 69], None, 65],
+            [60, [65, 69], None, 65]
+        ]
+        self.assertEqual(out, expected)
+
+    def test_long(self):
+        # deeper than the recursion limit
+        pitch_motif = [60, 64, 67] * 400
+        out = lead(pitch_motif, [0, 4, 7], [0])
+        self.assertEqual(out, [pitch_motif])
+
+
+class TestLeadTopK(unittest.TestCase):
+    pitch_motif = [60, [64, 67], None, 64]
+    harmony = [0, 5, 9] # F
+
+    def cost(self, pitch_motif):
+        return sum(
+            abs(new - pitch)
+            for pitch, new in zip(_extract(self.pitch_motif),
+                _extract(pitch_motif))
+            if pitch is not None
+        )
+
+    def test(self):
+        for similar in None, 'direction', 'ordinal', 'step':
+            for complete in True, False:
+                motifs = lead(self.pitch_motif, self.harmony, [1, 0, -1],
+                    complete, similar)
+                expected = sorted(motifs, key=self.cost)[:3]
+                out = lead(self.pitch_motif, self.harmony, [1, 0, -1],
+                    complete, similar, top_k=3)
+                self.assertEqual(out, expected)
+
+    def test_cost(self):
+        # not called for rests
+        def cost(pitch, new):
+            return (new - pitch)**2
+
+        motifs = lead(self.pitch_motif, self.harmony)
+        expected = sorted(motifs, key=lambda motif: sum(
+            cost(pitch, new)
+            for pitch, new in zip(_extract(self.pitch_motif), _extract(motif))
+            if pitch is not None
+        ))
+        out = lead(self.pitch_motif, self.harmony, cost=cost)
+        self.assertEqual(out, expected)
+
+    def test_repeated_steps(self):
+        motifs = lead(self.pitch_motif, self.harmony, [1, 0, 1], False, None)
+        expected = sorted(motifs, key=self.cost)[:20]
+        out = lead(self.pitch_motif, self.harmony, [1, 0, 1], False, None,
+            top_k=20)
+        self.assertEqual(out, expected)
+
+    def test_workers(self):
+        self.assertRaises(ValueError, lead, self.pitch_motif, self.harmony,
+            top_k=3, workers=2)
+        self.assertRaises(ValueError, lead, self.pitch_motif, self.harmony,
+            cost=abs, chunksize=1)
+
+
+class TestLeadWorkers(unittest.TestCase):
+    pitch_motif = [55, [60, 64], 67, 72, None, 71]
+    harmony = [2, 7, 11] # G
+
+    @mock.patch('ch0p1n.motif._SERIAL_SIZE', 0)
+    def test(self):
+        out = lead(self.pitch_motif, self.harmony, workers=2, chunksize=1)
+        expected = lead(self.pitch_motif, self.harmony)
+        self.assertEqual(out, expected)
+
+
+class TestILead(unittest.TestCase):
+    def test(self):
+        pitch_motif = [55, [60, 64], 67]
+        harmony = [2, 7, 11] # G
+        out = ilead(pitch_motif, harmony)
+        self.assertNotIsInstance(out, list)
+        self.assertEqual(list(out), lead(pitch_motif, harmony))
+
+    def test_first(self):
+        pitch_motif = [55, 60, 64, 67]
+        out = next(ilead(pitch_motif, [2, 7, 11], [0, 1]))
+        expected = [55, 62, 67, 71]
+        self.assertEqual(out, expected)
+
 
 class TestStretch(unittest.TestCase):
     def test(self):
@@ -139,6 +406,101 @@ class TestThread(unittest.TestCase):
         self.assertEqual(out, expected)
 
 
+class TestThreadWorkers(unittest.TestCase):
+    @mock.patch('ch0p1n.motif._SERIAL_SIZE', 0)
+    def test(self):
+        args = (
+            [61, 61, 67, 67],
+            [2, 2, 2, 2],
+            [[0, 4, 7], [2, 7, 11]] * 4,
+            [1] * 8,
+            [-1, 0, 1]
+        )
+        out = thread(*args, workers=2)
+        expected = thread(*args)
+        self.assertEqual(out, expected)
+
+
+class TestIThread(unittest.TestCase):
+    def test(self):
+        pitch_motif = [61, 61, 67, 67]
+        duration_motif = [2, 2, 2, 2]
+        harmonies = [[0, 4, 7], [2, 7, 11]]
+        durations = [3, 5]
+        out = ithread(pitch_motif, duration_motif, harmonies,
+            durations, [-1, 0])
+        self.assertEqual(next(out), [60, 60, 62, 62])
+        self.assertEqual(next(out), [60, 60, 67, 67])
+        self.assertRaises(StopIteration, next, out)
+
+
+class TestCache(unittest.TestCase):
+    # I-V-I-V
+    args = (
+        [61, 61, 61, 61],
+        [2, 2, 2, 2],
+        [[0, 4, 7], [2, 7, 11]] * 2,
+        [2] * 4,
+        [-1, 0, 1]
+    )
+
+    def setUp(self):
+        enable_cache(16)
+
+    def tearDown(self):
+        disable_cache()
+
+    def test_thread(self):
+        out = thread(*self.args)
+        disable_cache()
+        expected = thread(*self.args)
+        self.assertEqual(out, expected)
+
+    def test_info(self):
+        thread(*self.args)
+        expected = {
+            'hits': 6, 'misses': 6, 'evictions': 0, 'size': 6, 'maxsize': 16
+        }
+        self.assertEqual(cache_info(), expected)
+
+    def test_evict(self):
+        enable_cache(2)
+        for step in [1, 2, 3, 1]:
+            transpose([60], [0, 4], step)
+        self.assertEqual(cache_info()['evictions'], 2)
+        self.assertEqual(cache_info()['hits'], 0)
+
+    def test_clear(self):
+        transpose([60, [62, 64]], [0, 4], 1)
+        clear_cache()
+        self.assertEqual(cache_info()['size'], 0)
+        self.assertEqual(cache_info()['misses'], 0)
+
+    def test_copy(self):
+        out = transpose([60, [62, 64]], [0, 4], 1)
+        out[1].append(0)
+        out = transpose([60, [62, 64]], [0, 4], 1)
+        self.assertEqual(out, [64, [64, 72]])
+
+    def test_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        # a small cache, so that threads evict each other's items
+        enable_cache(2)
+
+        def work(step):
+            for _ in range(500):
+                for pitch in 60, 62, 64:
+                    transpose([pitch], [0, 4], step)
+
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(work, [1, 2, 3, 4]))
+
+        info = cache_info()
+        self.assertEqual(info['hits'] + info['misses'], 4 * 500 * 3)
+        self.assertLessEqual(info['size'], 2)
+
+
 class Test_segment(unittest.TestCase):
     def test(self):
         pitch_motif = [60, 61, 62, 63]
@@ -184,6 +546,7 @@ class TestIsComplete(unittest.TestCase):
     def test_exclude(self):
         out = is_complete(self.motif, self.harmony, [(3, 0)])
         self.assertFalse(out)
+        self.assertEqual(self.motif, [60, None, 62, [64, 67]])
 
 
 class TestIsSimilar(unittest.TestCase):
@@ -198,6 +561,60 @@ class TestIsSimilar(unittest.TestCase):
         out = is_similar(self.motif, self.proto, method="ordinal")
         self.assertFalse(out)
 
+    def test_steps(self):
+        scale = [0, 2, 4, 5, 7, 9, 11]
+        out = is_similar([60, 64, 62], [62, 65, 64], 'step', scale)
+        self.assertTrue(out)
+
+
+class Test_measure(unittest.TestCase):
+    scale = _reify([0, 2, 4, 5, 7, 9, 11])
+
+    def test(self):
+        self.assertEqual(_measure(60, 65, self.scale), 3)
+
+    def test_off_scale(self):
+        self.assertEqual(_measure(61, 66, self.scale), 4)
+        self.assertEqual(_measure(66, 61, self.scale), -4)
+        self.assertEqual(_measure(61, 61, self.scale), 0)
+        self.assertEqual(len(self.scale), 77)
+
+
+class TestIsSimilarMany(unittest.TestCase):
+    proto = [60, 50, [40, 60]]
+
+    def test(self):
+        motifs = [[60, 50, [70, 40]], [60, 50, 40], [62, None, 55, [40, 62]]]
+        out = is_similar_many(motifs, self.proto, 'ordinal')
+        expected = [False, False, True]
+        self.assertEqual(out, expected)
+
+    def test_methods(self):
+        motifs = [[62, 53, 62], [60, 52, 60], [None, 64], [60, None], []]
+        scale = [0, 2, 4, 5, 7, 9, 11]
+
+        for proto in self.proto, [61], []:
+            for method in 'direction', 'ordinal', 'step':
+                out = is_similar_many(motifs, proto, method, scale)
+                expected = [
+                    is_similar(motif, proto, method, scale)
+                    for motif in motifs
+                ]
+                self.assertEqual(out, expected)
+
+    def test_array(self):
+        import numpy
+
+        motifs = [[62, 53, 62], [60, 52, 60], [60, 62, 60]]
+        tops = numpy.array(motifs)
+        scale = [0, 2, 4, 5, 7, 9, 11]
+
+        for proto in [60, 50, 60], [61], []:
+            for method in 'direction', 'ordinal', 'step':
+                out = is_similar_many(tops, proto, method, scale)
+                expected = is_similar_many(motifs, proto, method, scale)
+                self.assertEqual(out, expected)
+
 
 class TestElaborate(unittest.TestCase):
     # Beethoven Sonata No.1
@@ -299,6 +716,12 @@ class TestReduce(unittest.TestCase):
         expected = ([80, 77, None], [2, 1, 1])
         self.assertEqual(out, expected)
 
+    def test_float(self):
+        duration_motif = [0.3, 0.1, 0.2, 0.35, 1]
+        out = reduce([60, 62, 64, 65, 67], duration_motif, 1, 3, 'right')
+        expected = ([60, 67], [0.3, 1 + sum(duration_motif[1:4])])
+        self.assertEqual(out, expected)
+
 
 class TestDivide(unittest.TestCase):
     pitch_motif = [60, 61, 62]
@@ -334,3 +757,10 @@ class TestFragment(unittest.TestCase):
         out = fragment(pitch_motif, duration_motif, 0, 1, 1/2)
         expected = ([60, 61], [1, 1])
         self.assertEqual(out, expected)
+
+    def test_end(self):
+        pitch_motif = [60, 61, 62, 63]
+        duration_motif = [1, 2, 1/2, 1/2]
+        out = fragment(pitch_motif, duration_motif, 2, 5, 1/2)
+        expected = ([62, 63], [1/2, 3/2])
+        self.assertEqual(out, expected)
@@ -0,0 +1,81 @@
+import unittest
+from xml.etree import ElementTree
+from ch0p1n.musicxml import to_musicxml, _spell, _parse, _to_values
+from fractions import Fraction
+
+
+class Test_spell(unittest.TestCase):
+    def test(self):
+        self.assertEqual(_spell(61, 2), 'C#4')
+        self.assertEqual(_spell(61, -2), 'D-4')
+        self.assertEqual(_spell('B-4', 0), 'B-4')
+        self.assertEqual(_spell(10, 0), 'A#-1')
+
+
+class Test_parse(unittest.TestCase):
+    def test(self):
+        self.assertEqual(_parse('C#4'), ('C', 1, '4'))
+        self.assertEqual(_parse('e##5'), ('E', 2, '5'))
+        self.assertEqual(_parse('G10'), ('G', 0, '10'))
+
+    def test_negative(self):
+        self.assertEqual(_parse('C-1'), ('C', 0, '-1'))
+        self.assertEqual(_parse('B--1', 10), ('B', -1, '-1'))
+
+        # a flat in octave 1
+        self.assertEqual(_parse('B-1', 34), ('B', -1, '1'))
+
+
+class Test_to_values(unittest.TestCase):
+    def test_tie(self):
+        out = [value[1:] for value in _to_values(Fraction(5, 4), 4)]
+        expected = [('quarter', 0, False), ('16th', 0, False)]
+        self.assertEqual(out, expected)
+
+    def test_triplet(self):
+        out = _to_values(Fraction(1, 3), 3)
+        expected = [(Fraction(1, 3), 'eighth', 0, True)]
+        self.assertEqual(out, expected)
+
+
+class TestToMusicXML(unittest.TestCase):
+    pitch_lines = [[60, [62, 63], None], [40]]
+    duration_lines = [[1, 4, 1], [6]]
+
+    def test(self):
+        xml = to_musicxml(self.pitch_lines, self.duration_lines, key=-3,
+            meter='3/4')
+        part = ElementTree.fromstring(xml).find('part')
+        measures = part.findall('measure')
+        self.assertEqual(len(measures), 2)
+
+        notes = measures[0].findall('note')
+        steps = [note.findtext('pitch/step') for note in notes]
+        self.assertEqual(steps, ['C', 'D', 'E', 'E'])
+        self.assertEqual(notes[2].findtext('pitch/alter'), '-1')
+        self.assertIsNotNone(notes[2].find('chord'))
+
+        # the chord is tied over the barline
+        ties = [tie.get('type') for tie in notes[1].findall('tie')]
+        self.assertEqual(ties, ['start'])
+        notes = measures[1].findall('note')
+        ties = [tie.get('type') for tie in notes[0].findall('tie')]
+        self.assertEqual(ties, ['stop'])
+
+    def test_octave(self):
+        xml = to_musicxml([[0, 34]], [[1, 1]], key=-2)
+        measure = ElementTree.fromstring(xml).find('part/measure')
+        notes = measure.findall('note')
+        pitches = [
+            (note.findtext('pitch/step'), note.findtext('pitch/alter'),
+                note.findtext('pitch/octave'))
+            for note in notes[:2]
+        ]
+        self.assertEqual(pitches, [('C', None, '-1'), ('B', '-1', '1')])
+
+    def test_empty_staff(self):
+        xml = to_musicxml(self.pitch_lines, self.duration_lines, 2)
+        part = ElementTree.fromstring(xml).find('part')
+        notes = part.find('measure').findall('note')
+        self.assertEqual(notes[-1].findtext('staff'), '2')
+        self.assertIsNotNone(notes[-1].find('rest'))
@@ -0,0 +1,60 @@
+import unittest
+from ch0p1n.motif import lead, thread
+from ch0p1n.space import lead_space, thread_space
+
+
+class TestLeadSpace(unittest.TestCase):
+    pitch_motif = [55, 60, 64, 67]
+    harmony = [2, 7, 11] # G
+
+    def test_filter(self):
+        space = lead_space(self.pitch_motif, self.harmony)
+        out = list(space.filter())
+        expected = lead(self.pitch_motif, self.harmony)
+        self.assertEqual(out, expected)
+
+    def test_sample(self):
+        space = lead_space(self.pitch_motif, self.harmony)
+        expected = lead(self.pitch_motif, self.harmony)
+
+        for exact in False, True:
+            out = space.sample(5, seed=1, exact=exact)
+            self.assertEqual(len(out), 5)
+            self.assertTrue(all(motif in expected for motif in out))
+            self.assertEqual(out, space.sample(5, seed=1, exact=exact))
+
+    def test_sample_sparse(self):
+        # 3 of 3**30 candidates pass
+        space = lead_space([60] * 30, [0, 4, 7], complete=False)
+        expected = lead([60] * 30, [0, 4, 7], complete=False)
+
+        out = space.sample(5, seed=0, exact=True)
+        self.assertEqual(sorted(out), sorted(expected))
+
+        # rejection sampling gives up
+        self.assertEqual(space.sample(5, seed=0, tries=100), [])
+
+
+class TestThreadSpace(unittest.TestCase):
+    args = (
+        [61, 61, 67, 67],
+        [2, 2, 2, 2],
+        [[0, 4, 7], [2, 7, 11]] * 4,
+        [1] * 8,
+        [-1, 0, 1]
+    )
+
+    def test_getitem(self):
+        space = thread_space(*self.args)
+        expected = thread(*self.args)
+        self.assertEqual(len(space), len(expected))
+        self.assertEqual([space[i] for i in range(len(space))], expected)
+        self.assertEqual(space[-1], expected[-1])
+
+    def test_sample(self):
+        space = thread_space(*self.args)
+        out = space.sample(10, seed=0)
+        self.assertEqual(len(out), 10)
+
+        # without replacement
+        self.assertEqual(len(set(map(tuple, out))), 10)
@@ -1,5 +1,12 @@
+import os
 import unittest
-from ch0p1n.utils import to_pitch_line, _get_scale
+import tempfile
+from io import BytesIO
+from ch0p1n.motif import MotifArray
+from ch0p1n.utils import (
+    to_pitch_line, read_notation_lines, _get_scale, to_notation_lines,
+    _to_vlq, export_midi, export_midi_many, render, render_many
+)
 
 
 class TestToPitchLine(unittest.TestCase):
@@ -10,8 +17,209 @@ class TestToPitchLine(unittest.TestCase):
         self.assertEqual(notation_line, expected)
 
 
+class TestReadNotationLines(unittest.TestCase):
+    def test(self):
+        lines = ['60 B-5 _ [61 c##2]\n', '\n', '[60 62] [ ] _']
+        out = list(read_notation_lines(lines))
+        expected = [[60, 82, None, [61, 38]], [[60, 62], [], None]]
+        self.assertEqual(out, expected)
+
+    def test_motif_array(self):
+        out = list(read_notation_lines(['60 _ [61 c##2]'], True))
+        expected = [MotifArray.from_lines([60, None, [61, 38]])]
+        self.assertEqual(out, expected)
+
+    def test_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'corpus.txt')
+
+            with open(path, 'w') as file:
+                file.write('C4 D4\n[E4 G4]\n')
+
+            out = list(read_notation_lines(path))
+            self.assertEqual(out, [[60, 62], [[64, 67]]])
+
+    def test_error(self):
+        lines = ['60 X5', 'C', '[60 [61]]', '60]', '[60', '-1', '128', 'B9']
+
+        for line in lines:
+            with self.assertRaisesRegex(ValueError, '^line 3: '):
+                list(read_notation_lines(['60', '', line]))
+
+
 class Test_get_scale(unittest.TestCase):
     def test(self):
         out = _get_scale(7)
         expected = ['F#', 'C#', 'G#', 'D#', 'A#', 'E#', 'B#']
         self.assertEqual(out, expected)
+
+
+class TestToNotationLines(unittest.TestCase):
+    def test(self):
+        pitch_lines = [[60, [61, 66], None], [138, (82,)]]
+        out = to_notation_lines(pitch_lines, 1)
+        expected = [['C4', [61, 'F#4'], None], [138, [82]]]
+        self.assertEqual(out, expected)
+        self.assertEqual(pitch_lines, [[60, [61, 66], None], [138, (82,)]])
+
+    def test_inverse(self):
+        for key in range(-7, 8):
+            pitch_line = list(range(12, 120))
+            notation_line = to_notation_lines([pitch_line], key)[0]
+            to_pitch_line(notation_line)
+            self.assertEqual(notation_line, pitch_line)
+
+
+class Test_to_vlq(unittest.TestCase):
+    def test(self):
+        self.assertEqual(_to_vlq(0), b'\x00')
+        self.assertEqual(_to_vlq(0x80), b'\x81\x00')
+        self.assertEqual(_to_vlq(0x0fffffff), b'\xff\xff\xff\x7f')
+
+
+class TestExportMidi(unittest.TestCase):
+    def test(self):
+        buffer = BytesIO()
+        export_midi([[60, None, [62, 64]]], [[1, -1, 1/2]], 120, 2, buffer)
+        out = buffer.getvalue()
+
+        # format 1, a tempo track and a track, 2 ticks per quarter
+        expected = b'MThd\x00\x00\x00\x06\x00\x01\x00\x02\x00\x02'
+        self.assertEqual(out[:14], expected)
+
+        # the track after the tempo track
+        track = out[14 + 8 + 11 + 8:]
+        expected = bytes([
+            0, 0x90, 60, 64,
+            2, 0x80, 60, 0,
+            2, 0x90, 62, 64,
+            0, 0x90, 64, 64,
+            1, 0x80, 62, 0,
+            0, 0x80, 64, 0,
+            0, 0xff, 0x2f, 0
+        ])
+        self.assertEqual(track, expected)
+
+    def test_range(self):
+        self.assertRaises(ValueError, export_midi, [[128]], [[1]], 120, 480,
+            BytesIO())
+
+    def test_short(self):
+        buffer = BytesIO()
+        export_midi([[60, 61]], [[0.001, 1]], 120, 480, buffer)
+        track = buffer.getvalue()[14 + 8 + 11 + 8:]
+
+        # the first note lasts a tick rather than none
+        expected = bytes([
+            0, 0x90, 60, 64,
+            0, 0x90, 61, 64,
+            1, 0x80, 60, 0
+        ])
+        self.assertEqual(track[:12], expected)
+
+
+class TestExportMidiMany(unittest.TestCase):
+    variants = [([[60]], [[1]]), ([[62], [50]], [[2], [2]])]
+
+    def test(self):
+        buffer = BytesIO()
+        export_midi_many(self.variants, 120, 2, buffer)
+        out = buffer.getvalue()
+
+        # a tempo track and a track for each line
+        self.assertEqual(out[10:12], b'\x00\x03')
+
+        # the second line rests during the first variant
+        track = out[-12:]
+        expected = bytes([
+            2, 0x91, 50, 64,
+            4, 0x81, 50, 0,
+            0, 0xff, 0x2f, 0
+        ])
+        self.assertEqual(track, expected)
+
+    def test_short_line(self):
+        variants = [
+            ([[60], [48]], [[2], [1]]),
+            ([[62], [50]], [[1], [1]])
+        ]
+
+        buffer = BytesIO()
+        export_midi_many(variants, 120, 2, buffer)
+
+        # the second line rests till the end of the first variant
+        track = buffer.getvalue()[-20:]
+        expected = bytes([
+            0, 0x91, 48, 64,
+            2, 0x81, 48, 0,
+            2, 0x91, 50, 64,
+            2, 0x81, 50, 0,
+            0, 0xff, 0x2f, 0
+        ])
+        self.assertEqual(track, expected)
+
+    def test_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = export_midi_many(self.variants, directory=directory)
+            self.assertEqual(
+                [os.path.basename(path) for path in paths],
+                ['0.mid', '1.mid']
+            )
+
+            for path, variant in zip(paths, self.variants):
+                buffer = BytesIO()
+                export_midi(*variant, path_or_buffer=buffer)
+
+                with open(path, 'rb') as file:
+                    self.assertEqual(file.read(), buffer.getvalue())
+
+
+class TestRender(unittest.TestCase):
+    def test(self):
+        pitch_lines = [[60, [62, 63]], [None, 40]]
+        duration_lines = [[1, 1], [1, 1]]
+        clefs = ['g', 'f']
+
+        out = render(pitch_lines, duration_lines, clefs=clefs)
+        self.assertTrue(out.startswith(b'<?xml'))
+        self.assertIn(b'<step>E</step>', out)
+
+        out = render(pitch_lines, duration_lines, fmt='midi')
+        self.assertTrue(out.startswith(b'MThd'))
+
+        # the arguments are not changed
+        self.assertEqual(pitch_lines, [[60, [62, 63]], [None, 40]])
+        self.assertEqual(clefs, ['g', 'f'])
+
+    def test_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'music.mid')
+            self.assertIsNone(render([[60]], [[1]], fmt='midi', path=path))
+
+            with open(path, 'rb') as file:
+                self.assertEqual(file.read(4), b'MThd')
+
+    def test_format(self):
+        self.assertRaises(ValueError, render, [[60]], [[1]], fmt='png')
+
+
+class TestRenderMany(unittest.TestCase):
+    def test(self):
+        variants = [([[60]], [[1]]), ([[62], [50]], [[2], [2]])]
+        expected = [render(*variant, fmt='midi') for variant in variants]
+        self.assertEqual(render_many(variants, fmt='midi'), expected)
+        self.assertEqual(
+            render_many(variants, fmt='midi', workers=2),
+            expected
+        )
+
+    def test_directory(self):
+        variants = [([[60]], [[1]]), ([[62], [50]], [[2], [2]])]
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = render_many(variants, fmt='midi', directory=directory)
+            self.assertEqual(
+                [os.path.basename(path) for path in paths],
+                ['0.mid', '1.mid']
+            )
+            self.assertTrue(all(os.path.exists(path) for path in paths))